@@ -11,69 +11,216 @@ This script runs the complete Excel review demo pipeline:
 - Generates visualizations and analysis
 """
 
+import hashlib
+import importlib.util
+import multiprocessing
+import os
 import subprocess
 import sys
+import textwrap
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import pandas as pd
-import matplotlib
-
-matplotlib.use("Agg")  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-from IPython.display import Image, display
-from io import BytesIO
+from typing import Sequence, Tuple
 
 # ============================================================================
 # 0. PACKAGE INSTALLATION
 # ============================================================================
 
 
-def install_if_missing(package):
-    """Install package if not already installed."""
-    try:
-        __import__(package)
-        print(f"[OK] {package} already installed")
-    except ImportError:
-        print(f"[Installing] {package}...")
+def install_if_missing(packages):
+    """Install any of packages not already installed, in a single pip call."""
+    missing = []
+    for package in packages:
+        if importlib.util.find_spec(package) is not None:
+            print(f"[OK] {package} already installed")
+        else:
+            missing.append(package)
+
+    if missing:
+        print(f"[Installing] {', '.join(missing)}...")
         subprocess.check_call(
-            [sys.executable, "-m", "pip", "install", package, "--quiet"]
+            [
+                sys.executable,
+                "-m",
+                "pip",
+                "install",
+                "--quiet",
+                "--disable-pip-version-check",
+                "--no-input",
+                "--no-color",
+                *missing,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.STDOUT,
         )
-        print(f"[OK] {package} installed successfully")
+        print(f"[OK] {', '.join(missing)} installed successfully")
 
 
 # Install required packages
 required_packages = ["pandas", "matplotlib", "networkx", "openpyxl", "requests"]
 
-print("Checking and installing required packages...")
-print("=" * 60)
+# Set AER_SKIP_INSTALL=1 (e.g. in CI or containers) to skip the package check
+if not os.environ.get("AER_SKIP_INSTALL"):
+    print("Checking and installing required packages...")
+    print("=" * 60)
 
-for package in required_packages:
-    install_if_missing(package)
+    install_if_missing(required_packages)
 
-print("=" * 60)
-print("[OK] All required packages are ready!\n")
+    print("=" * 60)
+    print("[OK] All required packages are ready!\n")
 
 
 # ============================================================================
 # 1. IMPORTS AND SETUP
 # ============================================================================
 
+import numpy as np
+import pandas as pd
 from src.utils.config_loader import load_config
 from src.utils.lmstudio_smoketest import test_lmstudio_connection
 from src.ai.orchestrator import run_demo
 
+_MPL = None
+
+
+def _mpl():
+    """Import matplotlib on first use and return (pyplot, patches, collections)."""
+    global _MPL
+    if _MPL is None:
+        import matplotlib
+
+        matplotlib.use("Agg")  # Use non-interactive backend
+        matplotlib.rcParams["path.simplify"] = True
+        matplotlib.rcParams["agg.path.chunksize"] = 10000
+        import matplotlib.pyplot as plt
+        import matplotlib.patches as mpatches
+        import matplotlib.collections as mcollections
+
+        _MPL = (plt, mpatches, mcollections)
+    return _MPL
+
+
+# Diagram definitions as (id, label) nodes and (source, target) edges
+
+# Diagram 1: Current Excel Review Process
+NODES_PROCESS = (
+    ("SRC", "Source Data"),
+    ("EXL", "Review Workbook.xlsx"),
+    ("REV", "Manual Review"),
+    ("KPIS", "KPIs / Dashboards"),
+    ("REPORT", "Reports & Actions"),
+)
+EDGES_PROCESS = (
+    ("SRC", "EXL"),
+    ("EXL", "REV"),
+    ("REV", "KPIS"),
+    ("REV", "REPORT"),
+)
+
+# Diagram 2: Agentic Automation Architecture
+NODES_ARCHITECTURE = (
+    ("SUB", "Sample Review Data"),
+    ("RAG", "RAG Context (SOPs)"),
+    ("LLM", "Local LLM"),
+    ("AIW", "AI Review Engine"),
+    ("CSV", "Demo CSV Output"),
+    ("LOG", "JSONL Logs"),
+)
+EDGES_ARCHITECTURE = (
+    ("SUB", "RAG"),
+    ("SUB", "LLM"),
+    ("RAG", "LLM"),
+    ("LLM", "AIW"),
+    ("AIW", "CSV"),
+    ("AIW", "LOG"),
+)
 
-def draw_flowchart(nodes, edges, title, layout_type="linear"):
+# Diagram 3: Roadmap
+NODES_ROADMAP = (
+    ("M1", "M1 Excel Reader"),
+    ("M2", "M2 AI Assistant"),
+    ("M3", "M3 Safe Writer"),
+    ("M4", "M4 Log Manager"),
+    ("M5", "M5 Taxonomy Mgr"),
+    ("M6", "M6 SOP Indexer"),
+    ("M7", "M7 Model Card"),
+    ("M8", "M8 Tracker"),
+    ("M9", "M9 Publication"),
+    ("M10", "M10 Orchestrator★"),
+    ("M11", "M11 UI & Chat"),
+    ("M12", "M12+ Future"),
+)
+EDGES_ROADMAP = (
+    ("M1", "M2"),
+    ("M2", "M3"),
+    ("M3", "M4"),
+    ("M4", "M5"),
+    ("M5", "M6"),
+    ("M6", "M7"),
+    ("M7", "M8"),
+    ("M8", "M9"),
+    ("M9", "M10"),
+    ("M10", "M11"),
+    ("M11", "M12"),
+)
+
+
+# Bump when draw_flowchart's rendering changes so cached PNGs are redrawn
+DIAGRAM_RENDER_VERSION = 2
+
+
+def _diagram_cache(nodes, edges, title, layout_type):
+    """Return (output_file, hash_file, diagram_hash, is_cached) for a diagram."""
+    output_file = (
+        title.replace(" ", "_").replace(":", "").replace("(", "").replace(")", "")
+        + ".png"
+    )
+    hash_file = output_file + ".sha1"
+    diagram_hash = hashlib.sha1(
+        repr((DIAGRAM_RENDER_VERSION, nodes, edges, title, layout_type)).encode("utf-8")
+    ).hexdigest()
+    is_cached = False
+    if os.path.exists(output_file) and os.path.exists(hash_file):
+        with open(hash_file, "r", encoding="utf-8") as f:
+            is_cached = f.read().strip() == diagram_hash
+    return output_file, hash_file, diagram_hash, is_cached
+
+
+def draw_flowchart(
+    nodes: Sequence[Tuple[str, str]],
+    edges: Sequence[Tuple[str, str]],
+    title: str,
+    layout_type: str = "linear",
+    ax=None,
+) -> None:
     """
     Draw a professional flowchart with manual positioning.
 
     Args:
-        nodes: list of (id, label) tuples
-        edges: list of (source, target) tuples
+        nodes: sequence of (id, label) tuples
+        edges: sequence of (source, target) tuples
         title: diagram title
         layout_type: 'linear' (left-to-right), 'tree' (hierarchical), or 'custom'
+        ax: optional Axes to reuse (cleared before drawing); a new figure is
+            created and closed when omitted
+
+    The PNG is skipped when its ``.sha1`` sidecar matches the diagram inputs.
     """
-    fig, ax = plt.subplots(figsize=(16, 10), dpi=120)
+    output_file, hash_file, diagram_hash, is_cached = _diagram_cache(
+        nodes, edges, title, layout_type
+    )
+    if is_cached:
+        print(f"📊 Diagram up to date (cached): {output_file}")
+        return
+
+    plt, mpatches, mcollections = _mpl()
+    owns_figure = ax is None
+    if owns_figure:
+        fig, ax = plt.subplots(figsize=(16, 10), dpi=120)
+    else:
+        fig = ax.figure
+        ax.clear()
     ax.set_xlim(0, 10)
     ax.set_ylim(0, 10)
     ax.axis("off")
@@ -90,10 +237,8 @@ def draw_flowchart(nodes, edges, title, layout_type="linear"):
     elif layout_type == "tree":
         # Tree-style layout (for process/architecture)
         node_dict = {nid: label for nid, label in nodes}
-        edge_dict = {}
+        edge_dict = defaultdict(list)
         for src, dst in edges:
-            if src not in edge_dict:
-                edge_dict[src] = []
             edge_dict[src].append(dst)
 
         # Find root (nodes with no incoming edges)
@@ -101,19 +246,16 @@ def draw_flowchart(nodes, edges, title, layout_type="linear"):
         roots = [nid for nid, _ in nodes if nid not in all_dests]
 
         if roots:
-            # Level-based positioning
+            # Level-based positioning (breadth-first from the roots)
             levels = {}
-
-            def assign_levels(node, level=0):
+            queue = deque((root, 0) for root in roots)
+            while queue:
+                node, level = queue.popleft()
                 if node in levels:
-                    return
+                    continue
                 levels[node] = level
-                if node in edge_dict:
-                    for child in edge_dict[node]:
-                        assign_levels(child, level + 1)
-
-            for root in roots:
-                assign_levels(root)
+                for child in edge_dict.get(node, ()):
+                    queue.append((child, level + 1))
 
             # Group by level
             level_groups = {}
@@ -131,46 +273,60 @@ def draw_flowchart(nodes, edges, title, layout_type="linear"):
                     x = 1 + (i * 8 / (n_nodes - 1)) if n_nodes > 1 else 5
                     node_positions[node] = (x, y)
 
-    # Draw edges first (so they appear behind nodes)
+    # Draw all edges as a single quiver artist above the boxes, clipped to the
+    # box borders so each arrowhead sits next to its target box
+    half_w, half_h = 0.5 + 0.05 + 0.08, 0.3 + 0.05 + 0.08  # box + pad + gap
+    arrows = []
     for src, dst in edges:
-        if src in node_positions and dst in node_positions:
-            x1, y1 = node_positions[src]
-            x2, y2 = node_positions[dst]
-
-            # Draw arrow
-            ax.annotate(
-                "",
-                xy=(x2, y2),
-                xytext=(x1, y1),
-                arrowprops=dict(
-                    arrowstyle="->",
-                    lw=2.5,
-                    color="#555555",
-                    connectionstyle="arc3,rad=0.15",
-                ),
-            )
+        if src not in node_positions or dst not in node_positions:
+            continue
+        (x1, y1), (x2, y2) = node_positions[src], node_positions[dst]
+        dx, dy = x2 - x1, y2 - y1
+        # Fraction of the centre-to-centre vector that lies inside one box
+        t = min(
+            half_w / abs(dx) if dx else float("inf"),
+            half_h / abs(dy) if dy else float("inf"),
+        )
+        if t >= 0.5:  # overlapping boxes (dense roadmap): centre to centre
+            t = 0.0
+        arrows.append((x1 + t * dx, y1 + t * dy, x2 - t * dx, y2 - t * dy))
+    if arrows:
+        x1, y1, x2, y2 = zip(*arrows)
+        ax.quiver(
+            x1,
+            y1,
+            [b - a for a, b in zip(x1, x2)],
+            [b - a for a, b in zip(y1, y2)],
+            angles="xy",
+            scale_units="xy",
+            scale=1,
+            color="#555555",
+            width=0.003,
+            zorder=3,
+        )
 
-    # Draw nodes
+    # Draw all node boxes as a single collection of rounded rectangles
+    node_xy = [node_positions[nid] for nid, _ in nodes if nid in node_positions]
+    boxes = [
+        mpatches.FancyBboxPatch((x - 0.5, y - 0.3), 1.0, 0.6, boxstyle="round,pad=0.05")
+        for x, y in node_xy
+    ]
+    ax.add_collection(
+        mcollections.PatchCollection(
+            boxes, facecolor="#4A90E2", edgecolor="#2E5C8A", linewidth=3, zorder=2
+        )
+    )
+
+    # Draw node labels
     for node_id, label in nodes:
         if node_id in node_positions:
             x, y = node_positions[node_id]
 
-            # Draw rounded rectangle
-            box = mpatches.FancyBboxPatch(
-                (x - 0.5, y - 0.3),
-                1.0,
-                0.6,
-                boxstyle="round,pad=0.05",
-                facecolor="#4A90E2",
-                edgecolor="#2E5C8A",
-                linewidth=3,
-            )
-            ax.add_patch(box)
-
             # Add text with wrapping
-            wrapped_label = "\n".join(
-                [label[i : i + 20] for i in range(0, len(label), 20)]
-            )
+            if len(label) <= 20:
+                wrapped_label = label
+            else:
+                wrapped_label = "\n".join(textwrap.wrap(label, 20)) or label
             ax.text(
                 x,
                 y,
@@ -186,18 +342,32 @@ def draw_flowchart(nodes, edges, title, layout_type="linear"):
     # Add title
     ax.text(5, 9.7, title, ha="center", fontsize=18, fontweight="bold")
 
-    plt.tight_layout()
-
-    # Save diagram
-    output_file = (
-        title.replace(" ", "_").replace(":", "").replace("(", "").replace(")", "")
-        + ".png"
-    )
-    plt.savefig(
-        output_file, format="png", bbox_inches="tight", dpi=150, facecolor="white"
+    fig.tight_layout()
+
+    # Save diagram (via a temp file so an interrupted run never leaves a
+    # half-written PNG next to a matching hash). tight_layout() above already
+    # fits the fixed 0-10 axes, so bbox_inches="tight" would only add a second
+    # render pass.
+    tmp_file = output_file + ".tmp"
+    fig.savefig(
+        tmp_file,
+        format="png",
+        dpi=100,
+        facecolor="white",
+        pil_kwargs={"optimize": False},
     )
+    os.replace(tmp_file, output_file)
+    with open(hash_file, "w", encoding="utf-8") as f:
+        f.write(diagram_hash)
     print(f"📊 Diagram saved: {output_file}")
-    plt.close()
+    if owns_figure:
+        plt.close(fig)
+
+
+def _draw_job(job):
+    """Process-pool entry point: draw one (nodes, edges, title, layout) job."""
+    nodes, edges, title, layout_type = job
+    draw_flowchart(nodes, edges, title, layout_type=layout_type)
 
 
 print("[OK] Setup complete! Ready to run the demo.\n")
@@ -211,77 +381,54 @@ print("=" * 60)
 print("GENERATING PROCESS DIAGRAMS")
 print("=" * 60)
 
-# Diagram 1: Current Excel Review Process
-nodes = [
-    ("SRC", "Source Data"),
-    ("EXL", "Review Workbook.xlsx"),
-    ("REV", "Manual Review"),
-    ("KPIS", "KPIs / Dashboards"),
-    ("REPORT", "Reports & Actions"),
-]
-edges = [
-    ("SRC", "EXL"),
-    ("EXL", "REV"),
-    ("REV", "KPIS"),
-    ("REV", "REPORT"),
-]
-draw_flowchart(nodes, edges, "Current Excel Review Process (Simplified)", layout_type="tree")
-
-# Diagram 2: Agentic Automation Architecture
-nodes = [
-    ("SUB", "Sample Review Data"),
-    ("RAG", "RAG Context (SOPs)"),
-    ("LLM", "Local LLM"),
-    ("AIW", "AI Review Engine"),
-    ("CSV", "Demo CSV Output"),
-    ("LOG", "JSONL Logs"),
-]
-edges = [
-    ("SUB", "RAG"),
-    ("SUB", "LLM"),
-    ("RAG", "LLM"),
-    ("LLM", "AIW"),
-    ("AIW", "CSV"),
-    ("AIW", "LOG"),
-]
-draw_flowchart(
-    nodes,
-    edges,
-    "Excel Review Agentic Automation Architecture (Local Prototype)",
-    layout_type="tree",
+diagram_jobs = (
+    # Diagram 1: Current Excel Review Process
+    (
+        NODES_PROCESS,
+        EDGES_PROCESS,
+        "Current Excel Review Process (Simplified)",
+        "tree",
+    ),
+    # Diagram 2: Agentic Automation Architecture
+    (
+        NODES_ARCHITECTURE,
+        EDGES_ARCHITECTURE,
+        "Excel Review Agentic Automation Architecture (Local Prototype)",
+        "tree",
+    ),
+    # Diagram 3: Roadmap
+    (
+        NODES_ROADMAP,
+        EDGES_ROADMAP,
+        "Excel Review Roadmap M1-M11 Completed",
+        "linear",
+    ),
 )
 
-# Diagram 3: Roadmap
-nodes = [
-    ("M1", "M1 Excel Reader"),
-    ("M2", "M2 AI Assistant"),
-    ("M3", "M3 Safe Writer"),
-    ("M4", "M4 Log Manager"),
-    ("M5", "M5 Taxonomy Mgr"),
-    ("M6", "M6 SOP Indexer"),
-    ("M7", "M7 Model Card"),
-    ("M8", "M8 Tracker"),
-    ("M9", "M9 Publication"),
-    ("M10", "M10 Orchestrator★"),
-    ("M11", "M11 UI & Chat"),
-    ("M12", "M12+ Future"),
-]
-edges = [
-    ("M1", "M2"),
-    ("M2", "M3"),
-    ("M3", "M4"),
-    ("M4", "M5"),
-    ("M5", "M6"),
-    ("M6", "M7"),
-    ("M7", "M8"),
-    ("M8", "M9"),
-    ("M9", "M10"),
-    ("M10", "M11"),
-    ("M11", "M12"),
-]
-draw_flowchart(
-    nodes, edges, "Excel Review Roadmap M1-M11 Completed", layout_type="linear"
-)
+pending_jobs = []
+for job in diagram_jobs:
+    output_file, _, _, is_cached = _diagram_cache(*job)
+    if is_cached:
+        print(f"📊 Diagram up to date (cached): {output_file}")
+    else:
+        pending_jobs.append(job)
+
+# Render cache misses in parallel worker processes. Only the "fork" start
+# method is used: this script has no __main__ guard, so "spawn" workers would
+# re-run it from the top.
+if len(pending_jobs) > 1 and "fork" in multiprocessing.get_all_start_methods():
+    with ProcessPoolExecutor(
+        max_workers=min(len(pending_jobs), os.cpu_count() or 1),
+        mp_context=multiprocessing.get_context("fork"),
+    ) as executor:
+        list(executor.map(_draw_job, pending_jobs))
+elif pending_jobs:
+    # One figure is shared by all diagrams to avoid repeated matplotlib setup
+    plt = _mpl()[0]
+    diagram_fig, diagram_ax = plt.subplots(figsize=(16, 10), dpi=120)
+    for nodes, edges, title, layout_type in pending_jobs:
+        draw_flowchart(nodes, edges, title, layout_type=layout_type, ax=diagram_ax)
+    plt.close(diagram_fig)
 
 print("\n✅ All diagrams generated!\n")
 
@@ -345,29 +492,66 @@ if not output_path.exists():
     print(f"❌ Error: Output file not found at {output_path}")
     sys.exit(1)
 
-df_demo = pd.read_csv(output_path)
-
-print(f"\n📊 Demo dataset loaded from: {output_path}")
-print(f"📊 Shape: {df_demo.shape[0]} rows x {df_demo.shape[1]} columns")
+# Peek at the header first so only the columns used below are parsed
+header_cols = pd.read_csv(output_path, nrows=0).columns
 
 # Find reason column
 candidate_cols = [
-    c for c in df_demo.columns if "AI_Reason" in c or "AI_ReasonSuggestion" in c
+    c for c in header_cols if "AI_Reason" in c or "AI_ReasonSuggestion" in c
 ]
 
+dtypes = {"AI_Confidence": "float32"}
+if candidate_cols:
+    dtypes[candidate_cols[0]] = "category"
+used_cols = [c for c in dtypes if c in header_cols]
+
+# Prefer the Parquet copy written alongside the CSV when it is at least as new
+parquet_path = output_path.with_suffix(".parquet")
+if (
+    parquet_path.exists()
+    and parquet_path.stat().st_mtime >= output_path.stat().st_mtime
+):
+    df_demo = pd.read_parquet(parquet_path, columns=used_cols).astype(
+        {c: dtypes[c] for c in used_cols}
+    )
+else:
+    # Use Arrow's multi-threaded CSV parser when pyarrow is installed
+    csv_engine = "pyarrow" if importlib.util.find_spec("pyarrow") is not None else "c"
+    df_demo = pd.read_csv(
+        output_path,
+        usecols=used_cols,
+        dtype=dtypes,
+        engine=csv_engine,
+    )
+
+print(f"\n📊 Demo dataset loaded from: {output_path}")
+print(f"📊 Shape: {df_demo.shape[0]} rows x {len(header_cols)} columns")
+
 if candidate_cols:
     reason_col = candidate_cols[0]
     print(f"📊 Reason column: {reason_col}")
 
-    # Show distribution
-    reason_counts = df_demo[reason_col].value_counts().head(10)
+    # Show distribution (histogram over the categorical codes; -1 marks NaN)
+    reasons = df_demo[reason_col].cat
+    codes = reasons.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(reasons.categories))
+    top = np.argsort(-counts, kind="stable")[:10]
+    top = top[counts[top] > 0]
+    reason_counts = pd.Series(
+        counts[top], index=reasons.categories[top], name="count"
+    )
     print("\n📊 Top AI Reason Suggestions:")
     print(reason_counts)
 
     # Create visualization
+    plt = _mpl()[0]
     fig, ax = plt.subplots(figsize=(12, 6), dpi=100)
-    reason_counts.plot(
-        kind="bar", ax=ax, color="#4A90E2", edgecolor="#2E5C8A", linewidth=1.5
+    ax.bar(
+        reason_counts.index.astype(str),
+        reason_counts.to_numpy(),
+        color="#4A90E2",
+        edgecolor="#2E5C8A",
+        linewidth=1.5,
     )
     ax.set_title("Top AI Reason Suggestions", fontsize=14, fontweight="bold", pad=15)
     ax.set_xlabel("Reason", fontsize=12, fontweight="bold")
@@ -375,22 +559,28 @@ if candidate_cols:
     plt.xticks(rotation=45, ha="right")
     plt.grid(axis="y", alpha=0.3, linestyle="--")
     plt.tight_layout()
-    plt.savefig("AI_Reason_Distribution.png", bbox_inches="tight", dpi=150)
+    plt.savefig("AI_Reason_Distribution.png", dpi=100, pil_kwargs={"optimize": False})
     print("\n📊 Chart saved: AI_Reason_Distribution.png")
     plt.close()
 
     # Check for errors or low confidence
     error_rows = df_demo[
-        (df_demo[reason_col].str.contains("Error:", na=False))
+        (df_demo[reason_col].str.contains("Error:", na=False, regex=False))
         | (df_demo["AI_Confidence"] < 0.5)
     ]
 
     if len(error_rows) > 0:
         print(f"\n⚠️  Found {len(error_rows)} rows with errors or low confidence (<0.5)")
-        for idx, row in error_rows.iterrows():
-            print(
-                f"  Row {idx}: {row[reason_col]} (Confidence: {row.get('AI_Confidence', 'N/A')})"
+        # Pull the columns out as NumPy arrays once; no per-row pandas access
+        idx = error_rows.index.to_numpy()
+        reasons = error_rows[reason_col].to_numpy()
+        conf = error_rows["AI_Confidence"].to_numpy()
+        print(
+            "\n".join(
+                f"  Row {i}: {r} (Confidence: {c})"
+                for i, r, c in zip(idx, reasons, conf)
             )
+        )
     else:
         print("\n✅ No errors or low-confidence predictions!")
 
@@ -6,7 +6,7 @@ This script generates a dummy Excel file with sample review data
 for demonstration purposes. No real company data.
 """
 
-import pandas as pd
+from openpyxl import Workbook
 from pathlib import Path
 
 def create_sample_workbook():
@@ -35,9 +35,6 @@ def create_sample_workbook():
         'Reviewer': ['JDoe', 'ASmith', 'BJones', 'JDoe', 'CWilson']
     }
     
-    # Create DataFrame
-    df = pd.DataFrame(data)
-    
     # Ensure output directory exists
     output_dir = Path('data')
     output_dir.mkdir(exist_ok=True)
@@ -45,13 +42,20 @@ def create_sample_workbook():
     # Write to Excel
     output_path = output_dir / 'Sample_Review_Workbook.xlsx'
     
-    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='ReviewSheet', index=False)
+    # Stream rows through a write-only workbook (no per-cell objects kept in memory)
+    columns = list(data.keys())
+    rows = list(zip(*data.values()))
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('ReviewSheet')
+    ws.append(columns)
+    for row in rows:
+        ws.append(row)
+    wb.save(output_path)
     
     print(f"✅ Created sample workbook: {output_path}")
     print(f"📊 Sheet: ReviewSheet")
-    print(f"📊 Rows: {len(df)}")
-    print(f"📊 Columns: {list(df.columns)}")
+    print(f"📊 Rows: {len(rows)}")
+    print(f"📊 Columns: {columns}")
     
     return output_path
 
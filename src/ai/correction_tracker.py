@@ -8,20 +8,32 @@ Correction Tracker Agent for Excel Quality Review (Phase M8).
 Compares AI-suggested corrections with human corrections and generates follow-up summaries.
 """
 
+import csv
 import json
 import logging
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 import hashlib
+import importlib.util
+import numpy as np
 import pandas as pd
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
 from openpyxl.utils.dataframe import dataframe_to_rows
 
+try:  # optional C-accelerated JSON encoder
+    import orjson
+except ImportError:
+    orjson = None
+
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
@@ -40,6 +52,80 @@ PARTIAL_THRESHOLD = 0.60  # Text similarity threshold for partial matches
 LOG_FILE_TEMPLATE = "logs/correction_tracker_{month}.jsonl"
 OUTPUT_CSV_TEMPLATE = "data/outputs/correction_summary_{month}.csv"
 OUTPUT_XLSX_TEMPLATE = "data/outputs/correction_summary_{month}.xlsx"
+AI_OUTPUT_CACHE_DIR = "data/cache"
+AI_OUTPUT_COLUMNS = [
+    "case_id",
+    "ai_reason",
+    "ai_confidence",
+    "ai_model_version",
+    "original_comment",
+    "timestamp",
+]
+# comparison_df column -> exported column name (CSV and Details sheet)
+DISPLAY_COLUMNS = {
+    "case_id": "Case_ID",
+    "ai_reason": "AI_Reason",
+    "human_reason": "Human_Reason",
+    "match_status": "Match_Status",
+    "ai_confidence": "AI_Confidence",
+    "reviewer": "Reviewer",
+    "review_date": "Date",
+}
+# token_set_ratio ignores duplicated/extra tokens ("calibration" vs
+# "calibration certificate"), which suits taxonomy-style QA reasons
+DEFAULT_SCORER = "token_set_ratio"
+
+
+def _json_default(obj: Any) -> Any:
+    # numpy scalars from pandas aggregations -> plain Python values
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _file_sha256(path: str) -> str:
+    """SHA-256 of a file, via hashlib.file_digest where available (3.11+)."""
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+        return h.hexdigest()
+
+
+def _iter_jsonl_lines(path: str, chunk_size: int = 1 << 20):
+    """Yield non-empty lines of a JSONL file, reading it in large binary chunks."""
+    tail = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            lines = (tail + chunk).split(b"\n")
+            # last piece may be a partial line; carry it into the next chunk
+            tail = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield line
+    if tail.strip():
+        yield tail
+
+
+# QA reasons repeat heavily (fixed taxonomy), so memoize the per-string work
+@lru_cache(maxsize=8192)
+def _norm(text: str) -> str:
+    return normalize_reason(text)
+
+
+@lru_cache(maxsize=8192)
+def _sorted_tokens(text: str) -> str:
+    return " ".join(sorted(text.split()))
+
+
+@lru_cache(maxsize=8192)
+def _sim(text1: str, text2: str, scorer: str = DEFAULT_SCORER) -> float:
+    return getattr(fuzz, scorer)(_norm(text1), _norm(text2)) / 100.0
 
 
 class CorrectionTracker:
@@ -49,6 +135,7 @@ class CorrectionTracker:
         self,
         config_path: str = "config.json",
         log_file: Optional[str] = None,
+        month: Optional[str] = None,
     ):
         """
         Initialize the Correction Tracker.
@@ -56,10 +143,22 @@ class CorrectionTracker:
         Args:
             config_path: Path to configuration file
             log_file: Path to JSONL log file (auto-generated if None)
+            month: Month in YYYYMM format used for outputs and logs
+                (defaults to current month)
         """
-        self.config = load_config()
+        self.config = load_config(config_path)
         self.log_file = log_file
-        self.month = datetime.now().strftime("%Y%m")
+        self.month = month or datetime.now().strftime("%Y%m")
+
+        # Fuzzy scorer is configurable by name (any rapidfuzz.fuzz scorer)
+        self.scorer_name = self.config.similarity_scorer
+        if not callable(getattr(fuzz, self.scorer_name, None)):
+            logger.warning(
+                f"Unknown similarity scorer '{self.scorer_name}', "
+                f"using {DEFAULT_SCORER}"
+            )
+            self.scorer_name = DEFAULT_SCORER
+        self.scorer = getattr(fuzz, self.scorer_name)
 
         if self.log_file is None:
             self.log_file = LOG_FILE_TEMPLATE.format(month=self.month)
@@ -68,6 +167,10 @@ class CorrectionTracker:
         Path(self.log_file).parent.mkdir(parents=True, exist_ok=True)
         Path("data/outputs").mkdir(parents=True, exist_ok=True)
 
+        # One line-buffered append handle for the tracker's lifetime (opened
+        # lazily), so every event reaches disk as soon as it is written
+        self._log_fh = None
+
         logger.info(f"Correction Tracker initialized for month {self.month}")
 
     def _log_event(self, event: Dict[str, Any]) -> None:
@@ -76,22 +179,40 @@ class CorrectionTracker:
         event["month"] = self.month
 
         try:
-            with open(self.log_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            if self._log_fh is None:
+                self._log_fh = open(self.log_file, "a", encoding="utf-8", buffering=1)
+            if orjson is not None:
+                line = orjson.dumps(event, default=_json_default).decode("utf-8")
+            else:
+                line = json.dumps(event, ensure_ascii=False, default=_json_default)
+            self._log_fh.write(line + "\n")
         except Exception as e:
             logger.error(f"Failed to write log entry: {e}")
 
+    def flush(self) -> None:
+        """Flush buffered log events to disk."""
+        if self._log_fh is not None:
+            self._log_fh.flush()
+
+    def close(self) -> None:
+        """Flush and close the log file handle."""
+        if self._log_fh is not None:
+            self._log_fh.close()
+            self._log_fh = None
+
+    def __enter__(self) -> "CorrectionTracker":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def _calculate_similarity(self, text1: str, text2: str) -> float:
         """Calculate text similarity using fuzzy matching."""
         if not text1 or not text2:
             return 0.0
 
-        # Normalize both texts
-        norm1 = normalize_reason(text1)
-        norm2 = normalize_reason(text2)
-
-        # Use token sort ratio for better matching
-        return fuzz.token_sort_ratio(norm1, norm2) / 100.0
+        # Configured scorer on normalized texts, memoized per pair
+        return _sim(text1, text2, self.scorer_name)
 
     def _classify_match_status(self, ai_reason: str, human_reason: str) -> str:
         """Classify the match status between AI and human reasons."""
@@ -108,35 +229,58 @@ class CorrectionTracker:
         """Load AI outputs from logs for the specified month."""
         log_pattern = f"logs/mtcr_review_assistant_{month}.jsonl"
 
-        if not os.path.exists(log_pattern):
+        try:
+            stat = os.stat(log_pattern)
+        except FileNotFoundError:
             logger.warning(f"No AI logs found for month {month}")
             return pd.DataFrame()
 
+        # Parsed logs are cached as parquet, keyed on the log's mtime and size
+        cache_dir = Path(AI_OUTPUT_CACHE_DIR)
+        cache_path = (
+            cache_dir / f"ai_outputs_{month}_{stat.st_mtime_ns}_{stat.st_size}.parquet"
+        )
+        if cache_path.exists():
+            try:
+                return pd.read_parquet(cache_path)
+            except Exception as e:
+                logger.debug(f"Ignoring unreadable AI output cache {cache_path}: {e}")
+
+        # orjson parses the raw bytes directly (surrounding whitespace is fine)
+        loads = orjson.loads if orjson is not None else json.loads
         records = []
-        with open(log_pattern, "r", encoding="utf-8") as f:
-            for line in f:
-                try:
-                    record = json.loads(line.strip())
-                    if record.get("response") and record["response"].get("reason"):
-                        records.append(
-                            {
-                                "case_id": record.get("row_id", "unknown"),
-                                "ai_reason": record["response"]["reason"],
-                                "ai_confidence": record["response"].get(
-                                    "confidence", 0.0
-                                ),
-                                "ai_model_version": record["response"].get(
-                                    "model_version", "unknown"
-                                ),
-                                "original_comment": record.get("original_comment", ""),
-                                "timestamp": record.get("timestamp"),
-                            }
+        for line in _iter_jsonl_lines(log_pattern):
+            try:
+                record = loads(line)
+                response = record.get("response")
+                if response and response.get("reason"):
+                    records.append(
+                        (
+                            record.get("row_id", "unknown"),
+                            response["reason"],
+                            response.get("confidence", 0.0),
+                            response.get("model_version", "unknown"),
+                            record.get("original_comment", ""),
+                            record.get("timestamp"),
                         )
-                except (json.JSONDecodeError, KeyError) as e:
-                    logger.warning(f"Skipping malformed log entry: {e}")
-                    continue
+                    )
+            except (json.JSONDecodeError, KeyError) as e:
+                logger.warning(f"Skipping malformed log entry: {e}")
+                continue
+
+        ai_df = pd.DataFrame.from_records(records, columns=AI_OUTPUT_COLUMNS)
 
-        return pd.DataFrame(records)
+        # Best effort: needs pyarrow/fastparquet and parquet-compatible values
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            ai_df.to_parquet(cache_path, index=False)
+            for stale in cache_dir.glob(f"ai_outputs_{month}_*.parquet"):
+                if stale != cache_path:
+                    stale.unlink(missing_ok=True)
+        except Exception as e:
+            logger.debug(f"AI output cache not written: {e}")
+
+        return ai_df
 
     def _load_human_corrections(self, month: str) -> pd.DataFrame:
         """Load human corrections from Excel file for the specified month."""
@@ -154,32 +298,29 @@ class CorrectionTracker:
         if ai_df.empty:
             return pd.DataFrame()
 
-        mock_data = []
-        for _, row in ai_df.iterrows():
-            # Simulate different human responses
-            case_id = row["case_id"]
-            ai_reason = row["ai_reason"]
-
-            # Mock human corrections with different scenarios
-            if case_id.endswith("1"):
-                human_reason = ai_reason  # Exact match
-            elif case_id.endswith("2"):
-                human_reason = ai_reason.replace(
-                    "calibration", "calibration certificate"
-                )  # Partial match
-            else:
-                human_reason = "Different reason provided by human reviewer"  # Override
-
-            mock_data.append(
-                {
-                    "case_id": case_id,
-                    "human_reason": human_reason,
-                    "reviewer": "QA_Reviewer_001",
-                    "review_date": datetime.now().strftime("%Y-%m-%d"),
-                }
-            )
+        # Simulate different human responses, whole columns at a time
+        case_ids = ai_df["case_id"].astype(str)
+        ai_reasons = ai_df["ai_reason"]
+        human_reason = np.where(
+            case_ids.str.endswith("1"),
+            ai_reasons,  # Exact match
+            np.where(
+                case_ids.str.endswith("2"),
+                ai_reasons.str.replace(
+                    "calibration", "calibration certificate", regex=False
+                ),  # Partial match
+                "Different reason provided by human reviewer",  # Override
+            ),
+        )
 
-        return pd.DataFrame(mock_data)
+        return pd.DataFrame(
+            {
+                "case_id": ai_df["case_id"].to_numpy(),
+                "human_reason": human_reason,
+                "reviewer": "QA_Reviewer_001",
+                "review_date": datetime.now().strftime("%Y-%m-%d"),
+            }
+        )
 
     def compare_corrections(self, month: str) -> pd.DataFrame:
         """
@@ -191,101 +332,181 @@ class CorrectionTracker:
         Returns:
             DataFrame with comparison results
         """
+        comparison_df, _ = self._compare_with_kpis(month)
+        return comparison_df
+
+    def _compare_with_kpis(self, month: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Compare corrections and compute the shared KPI counts in one pass."""
         logger.info(f"Comparing corrections for month {month}")
 
         # Load AI outputs
         ai_df = self._load_ai_outputs(month)
         if ai_df.empty:
             logger.warning(f"No AI outputs found for month {month}")
-            return pd.DataFrame()
+            return pd.DataFrame(), {}
 
         # Load human corrections (mock for now)
         human_df = self._create_mock_human_data(ai_df)
         if human_df.empty:
             logger.warning(f"No human corrections found for month {month}")
-            return pd.DataFrame()
+            return pd.DataFrame(), {}
 
-        # Merge dataframes on case_id
-        merged_df = pd.merge(ai_df, human_df, on="case_id", how="inner")
+        # Normalize each reason once, up front; the join carries these columns
+        ai_df["_ai_norm"] = ai_df["ai_reason"].fillna("").astype(str).map(_norm)
+        human_df["_human_norm"] = (
+            human_df["human_reason"].fillna("").astype(str).map(_norm)
+        )
+
+        # Join on case_id; with one human row per case, index lookups via
+        # Series.map are much cheaper than a general merge
+        if human_df["case_id"].is_unique:
+            lookup = human_df.set_index("case_id")
+            merged_df = ai_df[ai_df["case_id"].isin(lookup.index)].reset_index(
+                drop=True
+            )
+            for col in lookup.columns:
+                merged_df[col] = merged_df["case_id"].map(lookup[col])
+        else:
+            merged_df = pd.merge(ai_df, human_df, on="case_id", how="inner")
 
         if merged_df.empty:
             logger.warning("No matching cases found between AI and human data")
-            return pd.DataFrame()
-
-        # Classify match status for each case
-        results = []
-        for _, row in merged_df.iterrows():
-            match_status = self._classify_match_status(
-                row["ai_reason"], row["human_reason"]
+            return pd.DataFrame(), {}
+
+        # Reasons come from a fixed taxonomy, so many rows share the same
+        # normalized pair: score each distinct pair once and broadcast back
+        pair_ids: Dict[Tuple[str, str], int] = {}
+        pair_codes = np.fromiter(
+            (
+                pair_ids.setdefault(pair, len(pair_ids))
+                for pair in zip(merged_df["_ai_norm"], merged_df["_human_norm"])
+            ),
+            dtype=np.intp,
+            count=len(merged_df),
+        )
+        ai_norm = [ai for ai, _ in pair_ids]
+        human_norm = [human for _, human in pair_ids]
+
+        # Score the distinct pairs in one batched call on the normalized text
+        scorer = self.scorer
+        if self.scorer_name == "token_sort_ratio":
+            # token_sort_ratio is the Indel ratio of token-sorted strings: sort
+            # each distinct string once instead of re-tokenizing every pair
+            ai_norm = [_sorted_tokens(s) for s in ai_norm]
+            human_norm = [_sorted_tokens(s) for s in human_norm]
+            scorer = fuzz.ratio
+        scores = (
+            process.cpdist(
+                ai_norm,
+                human_norm,
+                scorer=scorer,
+                processor=None,
+                dtype=np.float64,
+                workers=-1,
             )
+            / 100.0
+        )[pair_codes]
+        # Empty reasons score 0.0, as in _calculate_similarity
+        has_text = (
+            merged_df["ai_reason"].fillna("").astype(bool)
+            & merged_df["human_reason"].fillna("").astype(bool)
+        ).to_numpy()
+        scores = np.where(has_text, scores, 0.0)
+        statuses = np.select(
+            [scores >= MATCH_THRESHOLD, scores >= PARTIAL_THRESHOLD],
+            ["Matched", "Partial"],
+            default="Overridden",
+        )
 
-            results.append(
-                {
-                    "case_id": row["case_id"],
-                    "ai_reason": row["ai_reason"],
-                    "human_reason": row["human_reason"],
-                    "match_status": match_status,
-                    "ai_confidence": row["ai_confidence"],
-                    "ai_model_version": row["ai_model_version"],
-                    "reviewer": row["reviewer"],
-                    "review_date": row["review_date"],
-                    "original_comment": row["original_comment"],
-                    "similarity_score": self._calculate_similarity(
-                        row["ai_reason"], row["human_reason"]
-                    ),
-                }
-            )
+        # Assemble the results by column assignment, not row by row
+        merged_df["match_status"] = statuses
+        merged_df["similarity_score"] = scores
+        comparison_df = merged_df[
+            [
+                "case_id",
+                "ai_reason",
+                "human_reason",
+                "match_status",
+                "ai_confidence",
+                "ai_model_version",
+                "reviewer",
+                "review_date",
+                "original_comment",
+                "similarity_score",
+            ]
+        ].reset_index(drop=True)
+        # Status and reviewer are low-cardinality labels
+        comparison_df = comparison_df.astype(
+            {"match_status": "category", "reviewer": "category"}
+        )
 
-        comparison_df = pd.DataFrame(results)
+        kpis = self._kpis(comparison_df)
 
         # Log the comparison results
         self._log_event(
             {
                 "event_type": "correction_comparison",
                 "month": month,
-                "cases_analyzed": int(len(comparison_df)),
-                "match_rate": float(
-                    (comparison_df["match_status"] == "Matched").mean()
-                ),
-                "avg_confidence": float(comparison_df["ai_confidence"].mean()),
-                "overridden_count": int(
-                    (comparison_df["match_status"] == "Overridden").sum()
-                ),
+                "cases_analyzed": kpis["total_cases"],
+                "match_rate": kpis["matched_count"] / kpis["total_cases"],
+                "avg_confidence": kpis["avg_confidence"],
+                "overridden_count": kpis["overridden_count"],
+                "similarity_scorer": self.scorer_name,
+                "normalize_cache": _norm.cache_info()._asdict(),
+                "similarity_cache": _sim.cache_info()._asdict(),
             }
         )
 
-        return comparison_df
+        return comparison_df, kpis
 
-    def generate_kpi_summary(self, comparison_df: pd.DataFrame) -> Dict[str, Any]:
-        """Generate KPI summary from comparison results."""
+    @staticmethod
+    def _kpis(comparison_df: pd.DataFrame) -> Dict[str, Any]:
+        """Status counts and confidence means from one value_counts and one groupby."""
+        status_counts = comparison_df["match_status"].value_counts()
+        confidence = comparison_df["ai_confidence"]
+        confidence_by_status = confidence.groupby(
+            comparison_df["match_status"], observed=True
+        ).mean()
+        return {
+            "total_cases": int(len(comparison_df)),
+            "matched_count": int(status_counts.get("Matched", 0)),
+            "overridden_count": int(status_counts.get("Overridden", 0)),
+            "partial_count": int(status_counts.get("Partial", 0)),
+            "avg_confidence": float(confidence.mean()),
+            "avg_confidence_matched": float(
+                confidence_by_status.get("Matched", float("nan"))
+            ),
+            "avg_confidence_overridden": float(
+                confidence_by_status.get("Overridden", 0.0)
+            ),
+        }
+
+    def generate_kpi_summary(
+        self, comparison_df: pd.DataFrame, kpis: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Generate KPI summary from comparison results (reusing kpis if given)."""
         if comparison_df.empty:
             return {}
 
-        total_cases = len(comparison_df)
-        matched_count = (comparison_df["match_status"] == "Matched").sum()
-        overridden_count = (comparison_df["match_status"] == "Overridden").sum()
-        partial_count = (comparison_df["match_status"] == "Partial").sum()
+        if kpis is None:
+            kpis = self._kpis(comparison_df)
+        total_cases = kpis["total_cases"]
+        matched_count = kpis["matched_count"]
+        overridden_count = kpis["overridden_count"]
 
         # Calculate confidence correlation
-        overridden_cases = comparison_df[comparison_df["match_status"] == "Overridden"]
-        avg_confidence_overridden = (
-            overridden_cases["ai_confidence"].mean()
-            if not overridden_cases.empty
-            else 0.0
-        )
-        avg_confidence_matched = comparison_df[
-            comparison_df["match_status"] == "Matched"
-        ]["ai_confidence"].mean()
+        avg_confidence_matched = kpis["avg_confidence_matched"]
+        avg_confidence_overridden = kpis["avg_confidence_overridden"]
 
         return {
             "month": self.month,
             "total_cases": total_cases,
-            "matched_count": int(matched_count),
-            "overridden_count": int(overridden_count),
-            "partial_count": int(partial_count),
+            "matched_count": matched_count,
+            "overridden_count": overridden_count,
+            "partial_count": kpis["partial_count"],
             "match_rate_pct": round((matched_count / total_cases) * 100, 2),
             "override_rate_pct": round((overridden_count / total_cases) * 100, 2),
-            "avg_confidence": round(comparison_df["ai_confidence"].mean(), 3),
+            "avg_confidence": round(kpis["avg_confidence"], 3),
             "avg_confidence_matched": round(avg_confidence_matched, 3),
             "avg_confidence_overridden": round(avg_confidence_overridden, 3),
             "confidence_correlation": round(
@@ -293,6 +514,11 @@ class CorrectionTracker:
             ),
         }
 
+    @staticmethod
+    def _to_display_df(comparison_df: pd.DataFrame) -> pd.DataFrame:
+        """Select and rename the comparison columns used in exports."""
+        return comparison_df[list(DISPLAY_COLUMNS)].rename(columns=DISPLAY_COLUMNS)
+
     def export_to_csv(
         self, comparison_df: pd.DataFrame, kpi_summary: Dict[str, Any]
     ) -> str:
@@ -311,207 +537,208 @@ class CorrectionTracker:
         }
 
         # Create detailed CSV
-        detailed_df = comparison_df[
-            [
-                "case_id",
-                "ai_reason",
-                "human_reason",
-                "match_status",
-                "ai_confidence",
-                "reviewer",
-                "review_date",
-            ]
-        ].copy()
-        detailed_df.columns = [
-            "Case_ID",
-            "AI_Reason",
-            "Human_Reason",
-            "Match_Status",
-            "AI_Confidence",
-            "Reviewer",
-            "Date",
-        ]
+        detailed_df = self._to_display_df(comparison_df)
 
         # Save both KPI and detailed data
         with open(csv_path, "w", newline="", encoding="utf-8") as f:
-            # Write KPI header and data
-            f.write("KPI Summary\n")
-            f.write(",".join(kpi_row.keys()) + "\n")
-            f.write(",".join(str(v) for v in kpi_row.values()) + "\n\n")
+            # Write KPI header and data (csv.writer quotes commas/quotes in values)
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(["KPI Summary"])
+            writer.writerow(kpi_row.keys())
+            writer.writerow(kpi_row.values())
+            writer.writerow([])
 
             # Write detailed data
-            f.write("Detailed Results\n")
+            writer.writerow(["Detailed Results"])
             detailed_df.to_csv(f, index=False)
 
         logger.info(f"CSV exported to {csv_path}")
         return csv_path
 
-    def export_to_excel(
+    def _excel_sheets(
         self, comparison_df: pd.DataFrame, kpi_summary: Dict[str, Any]
-    ) -> str:
-        """Export comparison results to Excel file with multiple sheets."""
-        xlsx_path = OUTPUT_XLSX_TEMPLATE.format(month=self.month)
-
-        # Create workbook
-        wb = openpyxl.Workbook()
-
-        # Remove default sheet
-        wb.remove(wb.active)
-
-        # Overview sheet
-        overview_ws = wb.create_sheet("Overview")
-        overview_data = [
-            ["Correction Tracker Summary", ""],
-            ["Month", kpi_summary.get("month", self.month)],
-            ["Total Cases Analyzed", kpi_summary.get("total_cases", 0)],
-            ["Match Rate (%)", kpi_summary.get("match_rate_pct", 0.0)],
-            ["Override Rate (%)", kpi_summary.get("override_rate_pct", 0.0)],
-            ["Average AI Confidence", kpi_summary.get("avg_confidence", 0.0)],
-            ["Confidence Correlation", kpi_summary.get("confidence_correlation", 0.0)],
-            ["Generated At", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-            ["Generated By", "Correction Tracker Agent"],
-        ]
-
-        for row in overview_data:
-            overview_ws.append(row)
-
-        # Style overview sheet
-        for cell in overview_ws[1]:
-            cell.font = Font(bold=True, size=14)
+    ) -> Dict[str, pd.DataFrame]:
+        """Build the workbook content as one DataFrame per sheet (header = row 1)."""
+        # Overview sheet: the title row doubles as the header row
+        overview_df = pd.DataFrame(
+            [
+                ["Month", kpi_summary.get("month", self.month)],
+                ["Total Cases Analyzed", kpi_summary.get("total_cases", 0)],
+                ["Match Rate (%)", kpi_summary.get("match_rate_pct", 0.0)],
+                ["Override Rate (%)", kpi_summary.get("override_rate_pct", 0.0)],
+                ["Average AI Confidence", kpi_summary.get("avg_confidence", 0.0)],
+                [
+                    "Confidence Correlation",
+                    kpi_summary.get("confidence_correlation", 0.0),
+                ],
+                ["Generated At", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+                ["Generated By", "Correction Tracker Agent"],
+            ],
+            columns=["Correction Tracker Summary", ""],
+        )
 
         # By Subsidiary sheet (placeholder)
-        subsidiary_ws = wb.create_sheet("By_Subsidiary")
-        subsidiary_data = [
+        subsidiary_df = pd.DataFrame(
             [
+                [
+                    "FR",
+                    kpi_summary.get("total_cases", 0),
+                    kpi_summary.get("match_rate_pct", 0.0),
+                    kpi_summary.get("override_rate_pct", 0.0),
+                    kpi_summary.get("avg_confidence", 0.0),
+                ]
+            ],
+            columns=[
                 "Subsidiary",
                 "Total Cases",
                 "Match Rate (%)",
                 "Override Rate (%)",
                 "Avg Confidence",
             ],
-            [
-                "FR",
-                kpi_summary.get("total_cases", 0),
-                kpi_summary.get("match_rate_pct", 0.0),
-                kpi_summary.get("override_rate_pct", 0.0),
-                kpi_summary.get("avg_confidence", 0.0),
-            ],
-        ]
-
-        for row in subsidiary_data:
-            subsidiary_ws.append(row)
+        )
 
-        # By Confidence Range sheet
-        confidence_ws = wb.create_sheet("By_Confidence_Range")
+        confidence_df = pd.DataFrame()
+        details_df = pd.DataFrame()
         if not comparison_df.empty:
-            # Create confidence ranges
-            comparison_df["confidence_range"] = pd.cut(
+            # By Confidence Range sheet: bin once, count matches from a bool
+            # column so every aggregation stays vectorized (no per-group lambda)
+            confidence_range = pd.cut(
                 comparison_df["ai_confidence"],
                 bins=[0, 0.5, 0.7, 0.8, 0.9, 1.0],
                 labels=["0.0-0.5", "0.5-0.7", "0.7-0.8", "0.8-0.9", "0.9-1.0"],
+                include_lowest=True,
             )
-
             confidence_summary = (
-                comparison_df.groupby("confidence_range", observed=True)
+                comparison_df.assign(
+                    confidence_range=confidence_range,
+                    _matched=comparison_df["match_status"].to_numpy() == "Matched",
+                )
+                .groupby("confidence_range", observed=True)
                 .agg(
-                    {
-                        "case_id": "count",
-                        "match_status": lambda x: (x == "Matched").sum(),
-                        "ai_confidence": "mean",
-                    }
+                    total=("case_id", "size"),
+                    matched=("_matched", "sum"),
+                    avg_conf=("ai_confidence", "mean"),
                 )
-                .round(3)
             )
-
-            confidence_summary.columns = [
-                "Total Cases",
-                "Matched Cases",
-                "Avg Confidence",
-            ]
-            confidence_summary["Match Rate (%)"] = (
-                confidence_summary["Matched Cases"]
-                / confidence_summary["Total Cases"]
-                * 100
-            ).round(2)
-
-            # Add headers
-            confidence_ws.append(
-                [
-                    "Confidence Range",
-                    "Total Cases",
-                    "Matched Cases",
-                    "Match Rate (%)",
-                    "Avg Confidence",
-                ]
+            total = confidence_summary["total"]
+            matched = confidence_summary["matched"]
+            confidence_df = pd.DataFrame(
+                {
+                    "Confidence Range": confidence_summary.index.astype(str),
+                    "Total Cases": total.to_numpy(),
+                    "Matched Cases": matched.to_numpy(),
+                    "Match Rate (%)": (matched / total * 100).round(2).to_numpy(),
+                    "Avg Confidence": confidence_summary["avg_conf"]
+                    .round(3)
+                    .to_numpy(),
+                }
             )
-            for idx, row in confidence_summary.iterrows():
-                confidence_ws.append(
-                    [
-                        idx,
-                        row["Total Cases"],
-                        row["Matched Cases"],
-                        row["Match Rate (%)"],
-                        row["Avg Confidence"],
-                    ]
-                )
 
-        # Details sheet
-        details_ws = wb.create_sheet("Details")
-        if not comparison_df.empty:
-            # Prepare data for details sheet
-            details_df = comparison_df[
-                [
-                    "case_id",
-                    "ai_reason",
-                    "human_reason",
-                    "match_status",
-                    "ai_confidence",
-                    "reviewer",
-                    "review_date",
-                ]
-            ].copy()
-            details_df.columns = [
-                "Case_ID",
-                "AI_Reason",
-                "Human_Reason",
-                "Match_Status",
-                "AI_Confidence",
-                "Reviewer",
-                "Date",
-            ]
+            # Details sheet
+            details_df = self._to_display_df(comparison_df)
 
-            # Add headers
-            details_ws.append(list(details_df.columns))
+        return {
+            "Overview": overview_df,
+            "By_Subsidiary": subsidiary_df,
+            "By_Confidence_Range": confidence_df,
+            "Details": details_df,
+        }
 
-            # Add data
-            for _, row in details_df.iterrows():
-                details_ws.append(list(row))
+    @staticmethod
+    def _column_widths(df: pd.DataFrame) -> List[int]:
+        """Column widths from the longest header/value per column, capped at 50."""
+        value_lengths = df.astype(str).apply(lambda c: c.str.len().max())
+        return [
+            min(max(len(str(col)), int(value_lengths[col])) + 2, 50)
+            for col in df.columns
+        ]
 
-            # Style the details sheet
-            for cell in details_ws[1]:
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(
-                    start_color="CCCCCC", end_color="CCCCCC", fill_type="solid"
-                )
+    def export_to_excel(
+        self, comparison_df: pd.DataFrame, kpi_summary: Dict[str, Any]
+    ) -> str:
+        """Export comparison results to Excel file with multiple sheets."""
+        xlsx_path = OUTPUT_XLSX_TEMPLATE.format(month=self.month)
+        sheets = self._excel_sheets(comparison_df, kpi_summary)
+
+        # xlsxwriter writes DataFrames in C; fall back to streaming openpyxl
+        if importlib.util.find_spec("xlsxwriter") is not None:
+            self._write_excel_xlsxwriter(xlsx_path, sheets)
+        else:
+            self._write_excel_openpyxl(xlsx_path, sheets)
 
-            # Auto-adjust column widths
-            for column in details_ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                details_ws.column_dimensions[column_letter].width = adjusted_width
-
-        # Save workbook
-        wb.save(xlsx_path)
         logger.info(f"Excel file exported to {xlsx_path}")
         return xlsx_path
 
+    def _write_excel_xlsxwriter(
+        self, xlsx_path: str, sheets: Dict[str, pd.DataFrame]
+    ) -> None:
+        """Write all sheets with pandas' xlsxwriter engine."""
+        with pd.ExcelWriter(xlsx_path, engine="xlsxwriter") as writer:
+            title_fmt = writer.book.add_format({"bold": True, "font_size": 14})
+            header_fmt = writer.book.add_format({"bold": True, "bg_color": "#CCCCCC"})
+            plain_header_fmt = writer.book.add_format({})
+
+            for name, df in sheets.items():
+                df.to_excel(writer, sheet_name=name, index=False)
+                ws = writer.sheets[name]
+                if df.columns.empty:
+                    continue
+
+                fmt = {"Overview": title_fmt, "Details": header_fmt}.get(
+                    name, plain_header_fmt
+                )
+                for col_idx, value in enumerate(df.columns):
+                    ws.write(0, col_idx, value, fmt)
+
+            details_df = sheets["Details"]
+            if not details_df.empty:
+                ws = writer.sheets["Details"]
+                for col_idx, width in enumerate(self._column_widths(details_df)):
+                    ws.set_column(col_idx, col_idx, width)
+                ws.autofilter(0, 0, len(details_df), len(details_df.columns) - 1)
+
+    def _write_excel_openpyxl(
+        self, xlsx_path: str, sheets: Dict[str, pd.DataFrame]
+    ) -> None:
+        """Write all sheets with a streaming write-only openpyxl workbook."""
+        wb = openpyxl.Workbook(write_only=True)
+        header_styles = {
+            "Overview": {"font": Font(bold=True, size=14)},
+            "Details": {
+                "font": Font(bold=True),
+                "fill": PatternFill(
+                    start_color="CCCCCC", end_color="CCCCCC", fill_type="solid"
+                ),
+            },
+        }
+
+        for name, df in sheets.items():
+            ws = wb.create_sheet(name)
+            if df.columns.empty:
+                continue
+
+            # Column widths must be set before any row is written
+            if name == "Details" and not df.empty:
+                for i, width in enumerate(self._column_widths(df), start=1):
+                    ws.column_dimensions[get_column_letter(i)].width = width
+
+            style = header_styles.get(name, {})
+            ws.append([self._styled_cell(ws, col, **style) for col in df.columns])
+            for row in df.itertuples(index=False, name=None):
+                ws.append(row)
+
+        wb.save(xlsx_path)
+
+    @staticmethod
+    def _styled_cell(ws, value: Any, font=None, fill=None) -> WriteOnlyCell:
+        """Build a styled cell for a write-only worksheet."""
+        cell = WriteOnlyCell(ws, value=value)
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        return cell
+
     def run_analysis(self, month: Optional[str] = None) -> Dict[str, Any]:
         """
         Run the complete correction analysis for the specified month.
@@ -527,20 +754,26 @@ class CorrectionTracker:
 
         logger.info(f"Starting correction analysis for month {month}")
 
-        # Compare corrections
-        comparison_df = self.compare_corrections(month)
+        # Compare corrections (KPI counts are computed once and reused below)
+        comparison_df, kpis = self._compare_with_kpis(month)
 
         if comparison_df.empty:
             logger.warning("No data to analyze")
             return {"error": "No data available for analysis"}
 
         # Generate KPI summary
-        kpi_summary = self.generate_kpi_summary(comparison_df)
+        kpi_summary = self.generate_kpi_summary(comparison_df, kpis)
 
         # Export results
         csv_path = self.export_to_csv(comparison_df, kpi_summary)
         xlsx_path = self.export_to_excel(comparison_df, kpi_summary)
 
+        # Checksum reference for each export
+        checksums = {
+            "csv_sha256": _file_sha256(csv_path),
+            "xlsx_sha256": _file_sha256(xlsx_path),
+        }
+
         # Log completion
         self._log_event(
             {
@@ -548,6 +781,7 @@ class CorrectionTracker:
                 "month": month,
                 "csv_path": csv_path,
                 "xlsx_path": xlsx_path,
+                **checksums,
                 "kpi_summary": kpi_summary,
             }
         )
@@ -558,10 +792,44 @@ class CorrectionTracker:
             "kpi_summary": kpi_summary,
             "csv_path": csv_path,
             "xlsx_path": xlsx_path,
+            "checksums": checksums,
             "log_file": self.log_file,
         }
 
 
+def _run_month(month: str, config_path: str) -> Dict[str, Any]:
+    """Process-pool entry point: analyze one month with its own tracker and log."""
+    with CorrectionTracker(config_path=config_path, month=month) as tracker:
+        return tracker.run_analysis(month)
+
+
+def run_analysis_batch(
+    months: List[str],
+    config_path: str = "config.json",
+    max_workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run the correction analysis for several months in parallel.
+
+    Months are independent (separate input logs, outputs and tracker logs), so
+    each one runs in its own worker process.
+
+    Args:
+        months: Months in YYYYMM format
+        config_path: Path to configuration file
+        max_workers: Worker processes (defaults to CPU count, capped by months)
+
+    Returns:
+        One run_analysis result per month, in the order given
+    """
+    if len(months) <= 1:
+        return [_run_month(month, config_path) for month in months]
+
+    workers = min(max_workers or os.cpu_count() or 1, len(months))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_month, months, [config_path] * len(months)))
+
+
 def main():
     """Main function for running the Correction Tracker."""
     import argparse
@@ -570,6 +838,11 @@ def main():
     parser.add_argument(
         "--month", type=str, help="Month in YYYYMM format (default: current month)"
     )
+    parser.add_argument(
+        "--months",
+        nargs="+",
+        help="Several months in YYYYMM format, analyzed in parallel",
+    )
     parser.add_argument(
         "--config", type=str, default="config.json", help="Configuration file path"
     )
@@ -580,11 +853,24 @@ def main():
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
-    # Initialize tracker
-    tracker = CorrectionTracker(config_path=args.config)
+    if args.months:
+        months = list(dict.fromkeys(args.months))
+        status = 0
+        for month, results in zip(months, run_analysis_batch(months, args.config)):
+            if "error" in results:
+                print(f"Error for month {month}: {results['error']}")
+                status = 1
+                continue
+            kpi = results["kpi_summary"]
+            print(
+                f"Month {month}: {kpi['total_cases']} cases, "
+                f"match rate {kpi['match_rate_pct']}% -> {results['csv_path']}"
+            )
+        return status
 
-    # Run analysis
-    results = tracker.run_analysis(month=args.month)
+    # Initialize tracker and run analysis
+    with CorrectionTracker(config_path=args.config, month=args.month) as tracker:
+        results = tracker.run_analysis(month=args.month)
 
     if "error" in results:
         print(f"Error: {results['error']}")
@@ -16,7 +16,6 @@ import sys
 import os
 from pathlib import Path
 from typing import Dict, Any, Optional
-from datetime import datetime
 
 import pandas as pd
 
@@ -29,7 +28,8 @@ if str(project_root) not in sys.path:
 from src.utils.config_loader import load_config, Config
 from src.excel.excel_reader import read_review_sheet
 from src.ai.review_assistant import ReviewAssistant
-from src.utils.sop_indexer import SOPIndexer
+from src.utils.llm_cache import DEFAULT_CACHE_FILE
+from src.utils.timestamps import now_iso
 
 
 class ExcelReviewOrchestrator:
@@ -46,27 +46,39 @@ class ExcelReviewOrchestrator:
         self.out_dir = Path(self.config.out_dir)
         self.out_dir.mkdir(parents=True, exist_ok=True)
 
-        # Load LM Studio URL from config
-        try:
-            config_path = Path("config.json")
-            if config_path.exists():
-                cfg_dict = json.loads(config_path.read_text(encoding="utf-8"))
-                self.lm_studio_url = cfg_dict.get(
-                    "lm_studio_url", "http://127.0.0.1:1234/v1"
-                )
-            else:
-                self.lm_studio_url = "http://127.0.0.1:1234/v1"
-        except Exception:
-            self.lm_studio_url = "http://127.0.0.1:1234/v1"
+        self.lm_studio_url = self.config.lm_studio_url
 
         # Initialize review assistant
         self.review_assistant = ReviewAssistant(
             lm_studio_url=self.lm_studio_url,
             sop_index_dir="data/embeddings",
             log_file="logs/review_assistant.jsonl",
+            llm_cache_file=DEFAULT_CACHE_FILE if self.config.llm_cache else None,
         )
 
-        self.step_logs = []
+        # Step records are streamed to the run log as they happen (one JSONL line
+        # each) through a handle that run_demo keeps open for the run only
+        self.log_file = Path("logs") / "excel_review_demo_orchestrator.jsonl"
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        self._log_fh = None
+
+    def close(self) -> None:
+        """Close the run log file handle."""
+        if self._log_fh is not None:
+            self._log_fh.close()
+            self._log_fh = None
+
+    def __enter__(self) -> "ExcelReviewOrchestrator":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _write_log(self, entry: Dict[str, Any]) -> None:
+        """Append one JSON record to the run log."""
+        if self._log_fh is None:
+            self._log_fh = open(self.log_file, "a", encoding="utf-8", buffering=1)
+        self._log_fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
 
     def _log_step(
         self, step_num: int, step_name: str, message: str, data: Optional[Dict] = None
@@ -76,14 +88,41 @@ class ExcelReviewOrchestrator:
             "step": step_num,
             "name": step_name,
             "message": message,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
             "data": data or {},
         }
-        self.step_logs.append(log_entry)
-        print(f"[STEP {step_num}] {step_name}: {message}")
-        if data:
-            for key, value in data.items():
-                print(f"  {key}: {value}")
+        try:
+            self._write_log({"module": "M10_Orchestrator", **log_entry})
+        except Exception as e:
+            print(f"  WARNING: step log write failed ({e})")
+        # Build the whole step block and emit it with a single write
+        lines = [f"[STEP {step_num}] {step_name}: {message}"]
+        lines.extend(f"  {key}: {value}" for key, value in (data or {}).items())
+        print("\n".join(lines))
+
+    @staticmethod
+    def _write_csv(df: pd.DataFrame, path: Path) -> str:
+        """Write df to CSV, preferring pyarrow's multithreaded writer; returns engine."""
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pa_csv
+        except ImportError:
+            pa = None
+
+        if pa is not None:
+            try:
+                pa_csv.write_csv(
+                    pa.Table.from_pandas(df, preserve_index=False),
+                    str(path),
+                    write_options=pa_csv.WriteOptions(quoting_style="needed"),
+                )
+                return "pyarrow"
+            except (pa.ArrowException, TypeError):
+                # mixed-type object columns or an old pyarrow; pandas handles both
+                pass
+
+        df.to_csv(path, index=False, encoding="utf-8")
+        return "pandas"
 
     def _map_ai_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -100,14 +139,15 @@ class ExcelReviewOrchestrator:
             "AI_model_version": "AI_ModelVersion",
         }
 
-        # Map columns and drop old ones to avoid duplicates
-        for old_col, new_col in column_mapping.items():
-            if old_col in df.columns:
-                df[new_col] = df[old_col]
-                # Drop old column to avoid duplicates
-                df = df.drop(columns=[old_col])
-
-        return df
+        # Single axis relabel; missing source columns are ignored by rename.
+        # Existing targets are replaced by their source, so drop them first
+        # rather than ending up with duplicate labels.
+        replaced = [
+            new_col
+            for old_col, new_col in column_mapping.items()
+            if old_col in df.columns and new_col in df.columns
+        ]
+        return df.drop(columns=replaced).rename(columns=column_mapping)
 
     def run_demo(self, sample_size: int = 10) -> Dict[str, Any]:
         """
@@ -119,6 +159,17 @@ class ExcelReviewOrchestrator:
         Returns:
             Dictionary with summary statistics
         """
+        # Copy-on-write for this run only: derived frames share buffers until
+        # written, so the reader's cleaning steps and the AI column writes never
+        # copy eagerly. Scoped so other pandas users in the process are unaffected.
+        try:
+            with pd.option_context("mode.copy_on_write", True):
+                return self._run_pipeline(sample_size)
+        finally:
+            self.close()
+
+    def _run_pipeline(self, sample_size: int) -> Dict[str, Any]:
+        """Run the pipeline steps; see run_demo."""
         print("=" * 60)
         print("Excel Review Demo Orchestrator - Starting Pipeline")
         print("=" * 60)
@@ -137,11 +188,13 @@ class ExcelReviewOrchestrator:
 
         # STEP 2: Load sample from Review Sheet
         try:
-            df, profile = read_review_sheet(self.config)
+            # The reader returns the first sample_size cleaned rows; the profile
+            # still describes the whole sheet
+            df_sample, profile = read_review_sheet(self.config, sample_size=sample_size)
             self._log_step(
                 2,
                 "Load sample from Review Sheet",
-                f"Loaded {len(df)} rows",
+                f"Loaded {profile.row_count} rows",
                 {
                     "total_rows": profile.row_count,
                     "columns": profile.col_count,
@@ -150,8 +203,7 @@ class ExcelReviewOrchestrator:
             )
 
             # Sample N rows
-            if len(df) > sample_size:
-                df_sample = df.head(sample_size).copy()
+            if profile.row_count > sample_size:
                 self._log_step(
                     2,
                     "Load sample from Review Sheet",
@@ -159,7 +211,6 @@ class ExcelReviewOrchestrator:
                     {},
                 )
             else:
-                df_sample = df.copy()
                 self._log_step(
                     2,
                     "Load sample from Review Sheet",
@@ -173,8 +224,8 @@ class ExcelReviewOrchestrator:
 
         # STEP 3: Build context (optional RAG)
         try:
-            # Check if SOP indexer is available
-            sop_indexer = SOPIndexer(embeddings_dir="data/embeddings")
+            # The review assistant opened the SOP index at init; reuse it rather
+            # than opening the index and loading the embedding model a second time
             self._log_step(
                 3,
                 "Build context (RAG)",
@@ -199,16 +250,18 @@ class ExcelReviewOrchestrator:
                 4, "Call LLM for reasoning", f"Processing {len(df_sample)} rows", {}
             )
 
-            # Process each row
-            ai_results = []
-            for idx, row in df_sample.iterrows():
-                result = self.review_assistant.infer_reason(row)
-                ai_results.append(result)
-                print(f"  Processed row {idx + 1}/{len(df_sample)}")
+            # Process rows with up to llm_max_concurrency LLM requests in flight
+            rows = [row for _, row in df_sample.iterrows()]
+            ai_results = self.review_assistant.infer_reason_batch(
+                rows, max_workers=self.config.llm_max_concurrency
+            )
+            print(f"  Processed {len(ai_results)}/{len(df_sample)} rows")
 
-            # Add AI columns to DataFrame
-            ai_df = pd.DataFrame(ai_results, index=df_sample.index)
-            df_with_ai = pd.concat([df_sample, ai_df], axis=1)
+            # Write AI columns straight into the sample frame (no second frame + concat)
+            ai_columns = list(dict.fromkeys(key for res in ai_results for key in res))
+            for col in ai_columns:
+                df_sample[col] = [res.get(col) for res in ai_results]
+            df_with_ai = df_sample
 
             # Map column names for compatibility
             df_with_ai = self._map_ai_columns(df_with_ai)
@@ -218,7 +271,8 @@ class ExcelReviewOrchestrator:
                 "Call LLM for reasoning",
                 f"Completed inference for {len(df_sample)} rows",
                 {
-                    "ai_columns_added": len(ai_df.columns),
+                    "ai_columns_added": len(ai_columns),
+                    "max_concurrency": self.config.llm_max_concurrency,
                 },
             )
 
@@ -229,7 +283,24 @@ class ExcelReviewOrchestrator:
         # STEP 5: Write AI_ columns to demo CSV
         try:
             output_csv = self.out_dir / "excel_review_demo.csv"
-            df_with_ai.to_csv(output_csv, index=False, encoding="utf-8")
+            csv_engine = self._write_csv(df_with_ai, output_csv)
+
+            # Columnar copy for fast, typed reloads (needs pyarrow or fastparquet);
+            # optional, so a failure here never aborts the run after the CSV
+            output_parquet = output_csv.with_suffix(".parquet")
+            parquet_errors: tuple = (ImportError, ValueError)
+            try:
+                import pyarrow as pa
+
+                parquet_errors += (pa.ArrowException,)
+            except ImportError:
+                pass
+            try:
+                df_with_ai.to_parquet(output_parquet, index=False, compression="zstd")
+            except parquet_errors as e:
+                print(f"  WARNING: Parquet copy skipped ({e})")
+                output_parquet = None
+
             self._log_step(
                 5,
                 "Write AI_ columns to demo CSV",
@@ -237,6 +308,8 @@ class ExcelReviewOrchestrator:
                 {
                     "rows": len(df_with_ai),
                     "columns": len(df_with_ai.columns),
+                    "csv_engine": csv_engine,
+                    "parquet": str(output_parquet) if output_parquet else "skipped",
                 },
             )
         except Exception as e:
@@ -245,20 +318,17 @@ class ExcelReviewOrchestrator:
 
         # STEP 6: Log each inference
         try:
-            log_file = Path("logs") / "excel_review_demo_orchestrator.jsonl"
-            log_file.parent.mkdir(parents=True, exist_ok=True)
-
-            log_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "module": "M10_Orchestrator",
-                "sample_size": sample_size,
-                "rows_processed": len(df_sample),
-                "output_file": str(output_csv),
-                "step_logs": self.step_logs,
-            }
-
-            with open(log_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+            # Step records are already on disk; close the run with a summary record
+            log_file = self.log_file
+            self._write_log(
+                {
+                    "timestamp": now_iso(),
+                    "module": "M10_Orchestrator",
+                    "sample_size": sample_size,
+                    "rows_processed": len(df_sample),
+                    "output_file": str(output_csv),
+                }
+            )
 
             self._log_step(6, "Log each inference", f"Logs written to {log_file}", {})
         except Exception as e:
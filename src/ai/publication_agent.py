@@ -3,10 +3,12 @@
 # It must NOT send emails or alter validated Excel/TWD/Tableau assets.
 # New outputs go under /outputs/publication and /logs/.
 from __future__ import annotations
-import argparse, hashlib, json, os, sys, textwrap, glob
+import argparse, hashlib, json, os, sys, textwrap
 from dataclasses import dataclass, asdict
-from datetime import datetime, timezone
+from datetime import datetime
+from functools import lru_cache
 from typing import Optional, Tuple, Dict, Any
+import numpy as np
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 from dateutil.parser import isoparse
@@ -17,6 +19,11 @@ TEMPLATES_DIR = os.path.join(ROOT, "templates")
 OUTPUT_DIR = os.path.join(ROOT, "outputs", "publication")
 LOGS_DIR = os.path.join(ROOT, "logs")
 
+# Add project root to path for shared utils
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from src.utils.timestamps import now_iso
+
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(LOGS_DIR, exist_ok=True)
 
@@ -42,6 +49,12 @@ NORMALIZE_MAP = {
     "mean_confidence": "avg_ai_confidence",
 }
 
+# Header separators folded to "_" in one str.translate pass
+HEADER_SEP_TABLE = str.maketrans({" ": "_", "-": "_"})
+
+# Trend arrows indexed by sign: 0 -> flat, 1 -> up, -1 -> down
+TREND_ARROWS = ("→", "▲", "▼")
+
 
 @dataclass
 class KpiRow:
@@ -96,29 +109,41 @@ def _labels_from_yyyymm(yyyymm: str) -> Tuple[str, str]:
     return month_en, month_fr
 
 
+CSV_SEARCH_DIRS = (
+    os.path.join(ROOT, "outputs", "m8"),
+    os.path.join(ROOT, "outputs"),
+    os.path.join(ROOT, "data", "exports"),
+    os.path.join(ROOT, "data", "outputs"),  # correction_tracker exports
+)
+
+
+@lru_cache(maxsize=32)
 def _find_default_csv(yyyymm: str) -> Optional[str]:
-    candidates = [
-        os.path.join(ROOT, "outputs", "m8", f"correction_summary_{yyyymm}.csv"),
-        os.path.join(ROOT, "outputs", f"correction_summary_{yyyymm}.csv"),
-        os.path.join(ROOT, "data", "exports", f"correction_summary_{yyyymm}.csv"),
-    ]
-    for p in candidates:
+    for d in CSV_SEARCH_DIRS:
+        p = os.path.join(d, f"correction_summary_{yyyymm}.csv")
         if os.path.exists(p):
             return p
-    # try glob if someone renamed slightly
-    g = glob.glob(os.path.join(ROOT, "**", f"*{yyyymm}*.csv"), recursive=True)
-    for p in g:
-        if "correction" in os.path.basename(p).lower():
-            return p
+    # someone renamed slightly: scan the same dirs (not the whole repo)
+    for d in CSV_SEARCH_DIRS:
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    name = entry.name.lower()
+                    if (
+                        name.endswith(".csv")
+                        and yyyymm in name
+                        and "correction" in name
+                        and entry.is_file()
+                    ):
+                        return entry.path
+        except FileNotFoundError:
+            continue
     return None
 
 
 def _normalize_headers(df: pd.DataFrame) -> pd.DataFrame:
-    cols = {}
-    for c in df.columns:
-        key = c.strip().lower().replace(" ", "_").replace("-", "_")
-        cols[c] = NORMALIZE_MAP.get(key, key)
-    df = df.rename(columns=cols)
+    keys = (c.strip().lower().translate(HEADER_SEP_TABLE) for c in df.columns)
+    df.columns = [NORMALIZE_MAP.get(k, k) for k in keys]
     # fill common missing columns with safe defaults
     for needed, default in [
         ("subsidiary", "Unknown"),
@@ -133,26 +158,18 @@ def _normalize_headers(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def _to_unit_fraction(x):
-    try:
-        x = float(x)
-    except Exception:
-        return 0.0
-    if x > 1.0:  # if passed 82 for 82%
-        return x / 100.0
-    return x
-
-
 def load_kpis(csv_path: str) -> pd.DataFrame:
     df = pd.read_csv(csv_path)
     df = _normalize_headers(df)
-    # normalize percent-ish columns
-    df["match_rate"] = df["match_rate"].map(_to_unit_fraction)
-    df["overrides_pct"] = df["overrides_pct"].map(_to_unit_fraction)
-    df["avg_ai_confidence"] = df["avg_ai_confidence"].map(_to_unit_fraction)
-    # numeric ints
-    for c in ["total_reviewed", "total_correct"]:
-        df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0).astype(int)
+    # normalize percent-ish columns to 0..1 (82 means 82%); unparseable -> 0.0
+    for c in ["match_rate", "overrides_pct", "avg_ai_confidence"]:
+        a = pd.to_numeric(df[c], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+        df[c] = np.where(a > 1.0, a / 100.0, a)
+    # numeric ints, both columns coerced and written back in one pass
+    int_cols = ["total_reviewed", "total_correct"]
+    df[int_cols] = (
+        df[int_cols].apply(pd.to_numeric, errors="coerce").fillna(0).astype(np.int64)
+    )
     return df
 
 
@@ -162,11 +179,15 @@ def summarize(
     total_reviewed = int(df["total_reviewed"].sum())
     total_correct = int(df["total_correct"].sum())
     match_rate = (total_correct / total_reviewed) if total_reviewed > 0 else 0.0
+    # review-weighted averages as dot products (no temporary weighted Series)
+    weights = df["total_reviewed"].to_numpy(dtype=float)
     overrides_pct = float(
-        (df["overrides_pct"] * df["total_reviewed"]).sum() / max(total_reviewed, 1)
+        np.dot(df["overrides_pct"].to_numpy(dtype=float), weights)
+        / max(total_reviewed, 1)
     )
     avg_conf = float(
-        (df["avg_ai_confidence"] * df["total_reviewed"]).sum() / max(total_reviewed, 1)
+        np.dot(df["avg_ai_confidence"].to_numpy(dtype=float), weights)
+        / max(total_reviewed, 1)
     )
 
     summary = KpiSummary(
@@ -194,23 +215,35 @@ def summarize(
     return summary, table
 
 
-def compare(prev: KpiSummary, curr: KpiSummary) -> Dict[str, Any]:
-    def delta(a, b):
-        return b - a
+def _subsidiary_rows(table: pd.DataFrame) -> list:
+    # format whole columns at once, then emit plain dicts for the template
+    def fmt(col: str, spec: str, scale: float = 1.0) -> list:
+        return np.char.mod(spec, table[col].to_numpy(dtype=float) * scale).tolist()
+
+    return table.assign(
+        total_reviewed=table["total_reviewed"].astype(int),
+        total_correct=table["total_correct"].astype(int),
+        match_rate=fmt("match_rate", "%.1f%%", 100.0),
+        overrides_pct=fmt("overrides_pct", "%.1f%%", 100.0),
+        avg_ai_confidence=fmt("avg_ai_confidence", "%.2f"),
+    ).to_dict(orient="records")
+
 
-    def arrow(x):
-        return "▲" if x > 0 else ("▼" if x < 0 else "→")
+def _arrow(x: float) -> str:
+    return TREND_ARROWS[(x > 0) - (x < 0)]
 
-    dm = delta(prev.match_rate, curr.match_rate)
-    do = delta(prev.overrides_pct, curr.overrides_pct)
-    dc = delta(prev.avg_ai_confidence, curr.avg_ai_confidence)
+
+def compare(prev: KpiSummary, curr: KpiSummary) -> Dict[str, Any]:
+    dm = curr.match_rate - prev.match_rate
+    do = curr.overrides_pct - prev.overrides_pct
+    dc = curr.avg_ai_confidence - prev.avg_ai_confidence
     return {
         "match_rate_delta": dm,
-        "match_rate_arrow": arrow(dm),
+        "match_rate_arrow": _arrow(dm),
         "overrides_delta": do,
-        "overrides_arrow": arrow(do),
+        "overrides_arrow": _arrow(do),
         "confidence_delta": dc,
-        "confidence_arrow": arrow(dc),
+        "confidence_arrow": _arrow(dc),
     }
 
 
@@ -218,10 +251,14 @@ def _sha256_text(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
-def _env():
+@lru_cache(maxsize=None)
+def _env() -> Environment:
+    # One shared environment; its template cache keeps parsed templates, and
+    # auto_reload=False skips the per-render mtime check on the template files
     return Environment(
         loader=FileSystemLoader(TEMPLATES_DIR),
         autoescape=select_autoescape(enabled_extensions=("html",)),
+        auto_reload=False,
     )
 
 
@@ -231,37 +268,59 @@ def render_email(locale: str, context: Dict[str, Any]) -> str:
         if locale.lower().startswith("fr")
         else "email_publication_en.html"
     )
-    env = _env()
-    tpl = env.get_template(template_name)
-    return tpl.render(**context)
+    return _env().get_template(template_name).render(**context)
+
+
+def _write_text_atomic(path: str, text: str) -> str:
+    # Write to a temp file, fsync, then rename over the target so an interrupted
+    # run never leaves a truncated draft behind; returns the text's sha256
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return _sha256_text(text)
 
 
-def write_outputs(yyyymm: str, en_html: str, fr_html: str) -> Dict[str, str]:
+def write_outputs(
+    yyyymm: str, en_html: str, fr_html: str
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    # returns (paths, sha256) keyed by en/fr/bi; hashes come from the in-memory text
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     en_path = os.path.join(OUTPUT_DIR, f"publication_email_{yyyymm}_en.html")
     fr_path = os.path.join(OUTPUT_DIR, f"publication_email_{yyyymm}_fr.html")
     bi_path = os.path.join(OUTPUT_DIR, f"publication_email_{yyyymm}_bilingual.html")
-    with open(en_path, "w", encoding="utf-8") as f:
-        f.write(en_html)
-    with open(fr_path, "w", encoding="utf-8") as f:
-        f.write(fr_html)
-    with open(bi_path, "w", encoding="utf-8") as f:
-        f.write("<hr/>".join([en_html, fr_html]))
-    return {"en": en_path, "fr": fr_path, "bi": bi_path}
-
-
-def log_jsonl(yyyymm: str, reviewer: str, files: Dict[str, str], meta: Dict[str, Any]):
+    files = {"en": en_path, "fr": fr_path, "bi": bi_path}
+    hashes = {
+        "en": _write_text_atomic(en_path, en_html),
+        "fr": _write_text_atomic(fr_path, fr_html),
+        "bi": _write_text_atomic(bi_path, "<hr/>".join([en_html, fr_html])),
+    }
+    return files, hashes
+
+
+def log_jsonl(
+    yyyymm: str,
+    reviewer: str,
+    files: Dict[str, str],
+    meta: Dict[str, Any],
+    sha256: Optional[Dict[str, str]] = None,
+):
+    # sha256: precomputed hashes from write_outputs; files are re-read only if missing
+    if sha256 is None:
+        sha256 = {
+            k: _sha256_text(open(v, "r", encoding="utf-8").read())
+            for k, v in files.items()
+        }
     log_path = os.path.join(LOGS_DIR, f"publication_agent_{yyyymm}.jsonl")
     record = {
         "module": "M9_PublicationAgent",
         "month": yyyymm,
         "reviewer": reviewer,
-        "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "timestamp": now_iso(),
         "outputs": files,
-        "sha256": {
-            k: _sha256_text(open(v, "r", encoding="utf-8").read())
-            for k, v in files.items()
-        },
+        "sha256": sha256,
         "metadata": meta,
         "model_version": "N/A (formatting only)",
         "assistive_mode": True,
@@ -362,17 +421,7 @@ def main():
             if deltas["confidence_delta"] is not None
             else "—"
         ),
-        "subsidiary_rows": [
-            {
-                "subsidiary": r["subsidiary"],
-                "total_reviewed": int(r["total_reviewed"]),
-                "total_correct": int(r["total_correct"]),
-                "match_rate": pct1(float(r["match_rate"])),
-                "overrides_pct": pct1(float(r["overrides_pct"])),
-                "avg_ai_confidence": f"{float(r['avg_ai_confidence']):.2f}",
-            }
-            for _, r in curr_table.iterrows()
-        ],
+        "subsidiary_rows": _subsidiary_rows(curr_table),
         "subject_en": f"Monthly Review Summary — {month_en}",
         "subject_fr": f"Résumé Mensuel — {month_fr}",
         "attachment_csv": os.path.relpath(csv_path, ROOT),
@@ -381,7 +430,7 @@ def main():
 
     en_html = render_email("en", context_common)
     fr_html = render_email("fr", context_common)
-    files = write_outputs(yyyymm, en_html, fr_html)
+    files, hashes = write_outputs(yyyymm, en_html, fr_html)
 
     log_jsonl(
         yyyymm,
@@ -396,6 +445,7 @@ def main():
             "deltas": deltas,
             "assistive_only": True,
         },
+        sha256=hashes,
     )
 
     print("[M9] Publication email drafts generated:")
@@ -12,10 +12,14 @@ Created by: Navid Broumandfar
 
 import json
 import logging
+import threading
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import sys
 import os
@@ -24,6 +28,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 from utils.sop_indexer import SOPIndexer
+from utils.llm_cache import LLMCache, DEFAULT_CACHE_FILE
 
 # Configure logging
 logging.basicConfig(
@@ -31,6 +36,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Number of LLM requests kept in flight by infer_reason_batch
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4
+
+# Keep-alive connections pooled per host; covers any sensible concurrency setting
+HTTP_POOL_SIZE = 16
+
+# Rows whose SOP context is retrieved together before their LLM requests are queued
+RETRIEVAL_BATCH_SIZE = 16
+
 
 class ReviewAssistant:
     """AI Review Assistant using RAG + LM Studio for comment analysis."""
@@ -40,6 +54,8 @@ class ReviewAssistant:
         lm_studio_url: str = "http://127.0.0.1:1234/v1",
         sop_index_dir: str = "data/embeddings",
         log_file: str = "logs/review_assistant.jsonl",
+        llm_cache_file: Optional[str] = None,
+        sop_indexer: Optional[SOPIndexer] = None,
     ):
         """
         Initialize the Review Assistant.
@@ -48,16 +64,41 @@ class ReviewAssistant:
             lm_studio_url: LM Studio API endpoint
             sop_index_dir: Directory containing SOP embeddings
             log_file: Path to JSONL log file
+            llm_cache_file: SQLite file caching identical LLM requests (opt-in;
+                None disables, e.g. DEFAULT_CACHE_FILE enables)
+            sop_indexer: Pre-built SOPIndexer to reuse (built from sop_index_dir if None)
         """
         self.lm_studio_url = lm_studio_url
         self.sop_index_dir = sop_index_dir
         self.log_file = log_file
+        self.llm_cache = LLMCache(llm_cache_file) if llm_cache_file else None
+        self._log_lock = threading.Lock()
+        # Served model id, resolved from /models once (needed for cache keys)
+        self._model_id: Optional[str] = None
+        self._model_lock = threading.Lock()
+        # Per-thread cache-hit flag of the row being inferred, for the inference log
+        self._local = threading.local()
+
+        # One keep-alive session for all LM Studio calls instead of a new
+        # connection per request; connection failures are retried with backoff
+        self._session = requests.Session()
+        self._session.headers.update({"Connection": "keep-alive"})
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.2),
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
 
         # Initialize SOP indexer
-        self.sop_indexer = SOPIndexer(embeddings_dir=sop_index_dir)
+        self.sop_indexer = sop_indexer or SOPIndexer(embeddings_dir=sop_index_dir)
 
-        # Load prompt template
+        # Load prompt template and split it once; per-row work is only substitution
         self.prompt_template = self._load_prompt_template()
+        self._system_prefix, self._user_template = self._split_prompt_template(
+            self.prompt_template
+        )
 
         # Create logs directory
         Path(self.log_file).parent.mkdir(parents=True, exist_ok=True)
@@ -97,7 +138,7 @@ Context: {context}"""
     def _test_lm_studio_connection(self) -> bool:
         """Test connection to LM Studio."""
         try:
-            response = requests.get(f"{self.lm_studio_url}/models", timeout=5)
+            response = self._session.get(f"{self.lm_studio_url}/models", timeout=5)
             if response.status_code == 200:
                 logger.info("LM Studio connection successful")
                 return True
@@ -108,44 +149,159 @@ Context: {context}"""
             logger.error(f"Failed to connect to LM Studio: {e}")
             return False
 
-    def _generate_prompt(self, comment: str, context: str) -> str:
-        """Generate the full prompt with comment and context."""
+    def _get_model_id(self) -> Optional[str]:
+        """Return the id of the model LM Studio is serving (queried once), or None."""
+        with self._model_lock:
+            if self._model_id is None:
+                try:
+                    response = self._session.get(
+                        f"{self.lm_studio_url}/models", timeout=5
+                    )
+                    response.raise_for_status()
+                    models = response.json().get("data") or []
+                    self._model_id = (models[0].get("id") or "") if models else ""
+                except Exception as e:
+                    # Not cached, so the next call asks again
+                    logger.warning(f"Could not resolve LM Studio model id: {e}")
+                    return None
+            return self._model_id or None
+
+    @staticmethod
+    def _split_prompt_template(template: str) -> Tuple[str, str]:
+        """
+        Split the prompt template into (static system prefix, per-row user template).
+
+        Everything before the first placeholder line is identical for every row and
+        is sent as a leading system message, so LM Studio can reuse its prompt cache
+        for that prefix; only the per-row remainder changes between requests.
+        """
+        placeholders = [
+            i
+            for i in (template.find("{comment}"), template.find("{context}"))
+            if i != -1
+        ]
+        split_at = (
+            template.rfind("\n", 0, min(placeholders)) + 1
+            if placeholders
+            else len(template)
+        )
+        return template[:split_at].strip(), template[split_at:]
+
+    def _generate_messages(self, comment: str, context: str) -> List[Dict[str, str]]:
+        """Generate chat messages with comment and context."""
         # Use replace instead of format to avoid issues with curly braces in JSON examples
-        prompt = self.prompt_template.replace("{comment}", comment).replace(
-            "{context}", context
+        user_content = (
+            self._user_template.replace("{comment}", comment)
+            .replace("{context}", context)
+            .strip()
         )
-        return prompt
 
-    def _call_lm_studio(self, prompt: str) -> Optional[str]:
+        messages = []
+        if self._system_prefix:
+            messages.append({"role": "system", "content": self._system_prefix})
+        messages.append({"role": "user", "content": user_content})
+        return messages
+
+    def _call_lm_studio(self, messages: List[Dict[str, str]]) -> Optional[str]:
         """Call LM Studio API for inference."""
         try:
             payload = {
                 "model": "local-model",  # LM Studio uses this for local models
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.1,
+                "messages": messages,
+                "temperature": 0.0,  # Deterministic, so responses are cacheable
                 "max_tokens": 500,
-                "stream": False,
+                "stream": True,
+                "cache_prompt": True,  # Reuse the KV cache for the shared prefix
             }
 
-            response = requests.post(
-                f"{self.lm_studio_url}/chat/completions",
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=30,
-            )
+            cache_key = None
+            self._local.cache_hit = False
+            # Without a known model id a cached answer could belong to another
+            # model, so the cache is bypassed entirely
+            model_id = self._get_model_id() if self.llm_cache is not None else None
+            if model_id is not None:
+                cache_key = LLMCache.make_key(payload, model_id, self.lm_studio_url)
+                cached = self.llm_cache.get(cache_key)
+                if cached is not None:
+                    logger.debug("LLM cache hit")
+                    self._local.cache_hit = True
+                    return cached
+
+            content = self._stream_completion(payload)
+            if content is not None and cache_key is not None:
+                self.llm_cache.set(cache_key, content)
+            return content
 
-            if response.status_code == 200:
-                result = response.json()
-                return result["choices"][0]["message"]["content"]
-            else:
+        except Exception as e:
+            logger.error(f"Error calling LM Studio: {e}")
+            return None
+
+    def _stream_completion(self, payload: Dict[str, Any]) -> Optional[str]:
+        """
+        Stream a chat completion and stop as soon as the first JSON object closes.
+
+        The model is asked for a single JSON object, so anything generated after
+        its closing brace is not needed; dropping the stream early saves decode time.
+
+        On early stop the response is closed rather than drained: closing discards
+        that pooled connection, but it is what makes the server stop decoding,
+        whereas draining would wait for generation to run on to max_tokens. Streams
+        that end on their own ([DONE]) are fully read and their connection is reused.
+        """
+        parts = []
+        depth = 0
+        in_string = escaped = False
+
+        with self._session.post(
+            f"{self.lm_studio_url}/chat/completions",
+            json=payload,
+            headers={"Content-Type": "application/json"},
+            timeout=30,
+            stream=True,
+        ) as response:
+            if response.status_code != 200:
                 logger.error(
                     f"LM Studio API error: {response.status_code} - {response.text}"
                 )
                 return None
 
-        except Exception as e:
-            logger.error(f"Error calling LM Studio: {e}")
-            return None
+            for raw_line in response.iter_lines():
+                line = raw_line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    break
+
+                # Keep-alive, usage and role-only chunks may carry no choices
+                choices = json.loads(data).get("choices") or []
+                if not choices:
+                    continue
+                choice = choices[0]
+                delta = (choice.get("delta") or {}).get("content") or ""
+                parts.append(delta)
+
+                # Track brace depth outside of JSON strings
+                for ch in delta:
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif ch == "\\":
+                            escaped = True
+                        elif ch == '"':
+                            in_string = False
+                    elif ch == '"' and depth > 0:
+                        in_string = True
+                    elif ch == "{":
+                        depth += 1
+                    elif ch == "}" and depth > 0:
+                        depth -= 1
+                        if depth == 0:
+                            # Deliberate close (not drain); see docstring
+                            response.close()
+                            return "".join(parts)
+
+        return "".join(parts)
 
     def _parse_json_response(self, response: str) -> Optional[Dict[str, Any]]:
         """Parse JSON response from LLM, handling potential formatting issues."""
@@ -247,6 +403,8 @@ Context: {context}"""
             "row_id": row_data.get("index", "unknown"),
             "original_comment": row_data.get("Comment", ""),
             "context_chunks": len(context),
+            # None when no LLM call was made for the row
+            "cache_hit": getattr(self._local, "cache_hit", None),
             "response": response,
             "error": error,
             "model_version": (
@@ -255,29 +413,37 @@ Context: {context}"""
         }
 
         try:
-            with open(self.log_file, "a", encoding="utf-8") as f:
+            with self._log_lock, open(self.log_file, "a", encoding="utf-8") as f:
                 f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
         except Exception as e:
             logger.error(f"Failed to write log entry: {e}")
 
-    def infer_reason(self, row: pd.Series) -> Dict[str, Any]:
+    @staticmethod
+    def _extract_comment(row: pd.Series) -> str:
+        """Return the row's review comment, or "" if no comment column is filled."""
+        # Try multiple possible column names for comments
+        for col_name in ["Site Review", "Comment", "Review Comment", "ReviewComment"]:
+            if col_name in row.index:
+                val = str(row.get(col_name, "")).strip()
+                if val and val.lower() not in ["nan", "none", ""]:
+                    return val
+        return ""
+
+    def infer_reason(
+        self, row: pd.Series, context_chunks: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
         """
         Infer reason for correction for a single row.
 
         Args:
             row: Pandas Series containing the row data
+            context_chunks: Pre-retrieved SOP context (retrieved here if None)
 
         Returns:
             Dictionary with AI inference results
         """
-        # Try multiple possible column names for comments
-        comment = ""
-        for col_name in ["Site Review", "Comment", "Review Comment", "ReviewComment"]:
-            if col_name in row.index:
-                val = str(row.get(col_name, "")).strip()
-                if val and val.lower() not in ["nan", "none", ""]:
-                    comment = val
-                    break
+        comment = self._extract_comment(row)
+        self._local.cache_hit = None
 
         if not comment or comment.lower() in ["nan", "none", ""]:
             logger.warning(f"Empty comment for row {row.name}")
@@ -291,7 +457,8 @@ Context: {context}"""
 
         try:
             # Retrieve relevant context using vector store search
-            context_chunks = self.sop_indexer.vector_store.search(comment, top_k=4)
+            if context_chunks is None:
+                context_chunks = self.sop_indexer.vector_store.search(comment, top_k=4)
             context_text = "\n\n".join(
                 [
                     chunk.get("content", chunk.get("text", ""))
@@ -299,11 +466,11 @@ Context: {context}"""
                 ]
             )
 
-            # Generate prompt
-            prompt = self._generate_prompt(comment, context_text)
+            # Generate prompt messages
+            messages = self._generate_messages(comment, context_text)
 
             # Call LM Studio
-            llm_response = self._call_lm_studio(prompt)
+            llm_response = self._call_lm_studio(messages)
 
             if llm_response is None:
                 error_msg = "Failed to get response from LM Studio"
@@ -468,12 +635,90 @@ Context: {context}"""
                 "AI_model_version": "ExcelReview-v0.1",
             }
 
-    def process_all(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _retrieve_contexts(
+        self, comments: List[str]
+    ) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        Retrieve SOP context for several comments with one batched encode + search.
+
+        Empty comments get no context; if batched retrieval fails each comment is
+        searched on its own here, so retrieval never runs in the LLM workers. A
+        comment whose search also fails is inferred without SOP context.
+        """
+        try:
+            found = iter(
+                self.sop_indexer.vector_store.search_batch(
+                    [c for c in comments if c], top_k=4
+                )
+            )
+            return [next(found) if c else [] for c in comments]
+        except Exception as e:
+            logger.warning(f"Batched SOP retrieval failed, retrieving per row: {e}")
+
+        contexts: List[List[Dict[str, Any]]] = []
+        for comment in comments:
+            try:
+                contexts.append(
+                    self.sop_indexer.vector_store.search(comment, top_k=4)
+                    if comment
+                    else []
+                )
+            except Exception as e:
+                logger.warning(f"SOP retrieval failed for comment, no context: {e}")
+                contexts.append([])
+        return contexts
+
+    def infer_reason_batch(
+        self,
+        rows: List[pd.Series],
+        max_workers: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        retrieval_batch_size: int = RETRIEVAL_BATCH_SIZE,
+    ) -> List[Dict[str, Any]]:
+        """
+        Infer reasons for several rows with concurrent LLM requests.
+
+        Args:
+            rows: Pandas Series for each row to analyze
+            max_workers: Maximum number of LLM requests in flight at once
+            retrieval_batch_size: Rows retrieved per batch before their LLM
+                requests are queued
+
+        Returns:
+            List of AI inference results, in the same order as rows
+        """
+        comments = [self._extract_comment(row) for row in rows]
+
+        if max_workers <= 1 or len(rows) <= 1:
+            contexts = self._retrieve_contexts(comments)
+            return [self.infer_reason(r, c) for r, c in zip(rows, contexts)]
+
+        # Dispatch longest comments first so long requests do not straggle at
+        # the tail of the batch; results are put back in input order
+        order = sorted(range(len(rows)), key=lambda i: len(comments[i]), reverse=True)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Producer: retrieve context one micro-batch at a time and queue its
+            # rows right away, so the workers start on LLM calls while the next
+            # micro-batch is still being embedded
+            futures = {}
+            for start in range(0, len(order), max(1, retrieval_batch_size)):
+                chunk = order[start : start + retrieval_batch_size]
+                contexts = self._retrieve_contexts([comments[i] for i in chunk])
+                for i, context in zip(chunk, contexts):
+                    futures[i] = executor.submit(self.infer_reason, rows[i], context)
+            for i, future in futures.items():
+                results[i] = future.result()
+        return results
+
+    def process_all(
+        self, df: pd.DataFrame, max_workers: int = DEFAULT_MAX_CONCURRENT_REQUESTS
+    ) -> pd.DataFrame:
         """
         Process all rows in the DataFrame.
 
         Args:
             df: DataFrame containing Quality Review data
+            max_workers: Maximum number of LLM requests in flight at once
 
         Returns:
             DataFrame with AI columns added
@@ -485,12 +730,10 @@ Context: {context}"""
             logger.error("Cannot connect to LM Studio. Please ensure it's running.")
             return df
 
-        # Process each row
-        ai_results = []
-        for idx, row in df.iterrows():
-            logger.info(f"Processing row {idx + 1}/{len(df)}")
-            result = self.infer_reason(row)
-            ai_results.append(result)
+        # Process all rows with batched retrieval and concurrent LLM requests
+        ai_results = self.infer_reason_batch(
+            [row for _, row in df.iterrows()], max_workers=max_workers
+        )
 
         # Add AI columns to DataFrame
         ai_df = pd.DataFrame(ai_results, index=df.index)
@@ -508,6 +751,12 @@ def main():
     parser.add_argument("--test", action="store_true", help="Run test with mock data")
     parser.add_argument("--input", type=str, help="Input CSV file path")
     parser.add_argument("--output", type=str, help="Output CSV file path")
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENT_REQUESTS,
+        help="Maximum number of LLM requests in flight at once",
+    )
 
     args = parser.parse_args()
 
@@ -533,7 +782,7 @@ def main():
         assistant = ReviewAssistant()
 
         # Process test data
-        result_df = assistant.process_all(df)
+        result_df = assistant.process_all(df, max_workers=args.max_workers)
 
         print("Results:")
         print(
@@ -544,7 +793,7 @@ def main():
         # Process real data
         df = pd.read_csv(args.input)
         assistant = ReviewAssistant()
-        result_df = assistant.process_all(df)
+        result_df = assistant.process_all(df, max_workers=args.max_workers)
         result_df.to_csv(args.output, index=False)
         print(f"Results saved to {args.output}")
 
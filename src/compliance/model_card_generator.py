@@ -8,19 +8,45 @@ import hashlib
 import datetime
 import os
 import subprocess
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Any
 from jinja2 import Template
 import markdown2
 from jsonschema import validate
 
+BASE_PATH = Path(__file__).parent.parent.parent
+TEMPLATE_PATH = BASE_PATH / "templates" / "model_card.md.j2"
+
+# Model/taxonomy/embedding files whose checksums go into the model card
+FILES_TO_VERIFY = (
+    "data/mappings/reason_to_sop.yml",
+    "data/taxonomy/reasons.latest.yml",
+    "src/utils/sop_indexer.py",
+    "src/utils/taxonomy_manager.py",
+    "src/ai/review_assistant.py",
+    "src/excel/mtcr_writer.py",
+    "src/logging/log_manager.py",
+)
+
 
 def sha256sum(path: str) -> str:
     """Compute SHA256 checksum of a file."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return "sha256:FILE_NOT_FOUND"
+    return _sha256sum_cached(path, st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=64)
+def _sha256sum_cached(path: str, mtime_ns: int, size: int) -> str:
+    """Hash a file once per (mtime, size); unchanged files hit the cache."""
     h = hashlib.sha256()
     try:
         with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
+            for chunk in iter(lambda: f.read(1 << 20), b""):
                 h.update(chunk)
         return "sha256:" + h.hexdigest()[:12]
     except FileNotFoundError:
@@ -37,34 +63,27 @@ def get_git_commit_hash() -> str:
 
 def collect_metadata() -> Dict[str, Any]:
     """Gather model/taxonomy/embedding info from prior modules."""
-    base_path = Path(__file__).parent.parent.parent
-
-    # Check for existing model files and configurations
-    files_to_verify = [
-        "data/mappings/reason_to_sop.yml",
-        "data/taxonomy/reasons.latest.yml",
-        "src/utils/sop_indexer.py",
-        "src/utils/taxonomy_manager.py",
-        "src/ai/review_assistant.py",
-        "src/excel/mtcr_writer.py",
-        "src/logging/log_manager.py",
-    ]
-
-    # Compute checksums for existing files
+    base_path = BASE_PATH
+
+    # Compute checksums for existing model files and configurations
     checksums = []
-    for file_path in files_to_verify:
+    for file_path in FILES_TO_VERIFY:
         full_path = base_path / file_path
-        if full_path.exists():
-            checksums.append(
-                {
-                    "file": file_path,
-                    "checksum": sha256sum(str(full_path)),
-                    "size_bytes": full_path.stat().st_size,
-                    "modified": datetime.datetime.fromtimestamp(
-                        full_path.stat().st_mtime
-                    ).isoformat(),
-                }
-            )
+        # One stat per file serves the existence check, size, mtime and hash key
+        try:
+            st = full_path.stat()
+        except FileNotFoundError:
+            continue
+        checksums.append(
+            {
+                "file": file_path,
+                "checksum": _sha256sum_cached(
+                    str(full_path), st.st_mtime_ns, st.st_size
+                ),
+                "size_bytes": st.st_size,
+                "modified": datetime.datetime.fromtimestamp(st.st_mtime).isoformat(),
+            }
+        )
 
     # Try to get performance metrics from logs if available
     accuracy = 0.82  # Default value
@@ -76,10 +95,9 @@ def collect_metadata() -> Dict[str, Any]:
         for log_file in logs_path.glob("*.jsonl"):
             try:
                 with open(log_file, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-                    if lines:
-                        # Get the last few lines to compute recent averages
-                        recent_lines = lines[-10:] if len(lines) > 10 else lines
+                    # Keep only the last few lines to compute recent averages
+                    recent_lines = deque(f, maxlen=10)
+                    if recent_lines:
                         confidences = []
                         for line in recent_lines:
                             try:
@@ -103,7 +121,7 @@ def collect_metadata() -> Dict[str, Any]:
         "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
         "commit_hash": get_git_commit_hash(),
         "project_version": "v0.7.0",
-        "files_verified": files_to_verify,
+        "files_verified": list(FILES_TO_VERIFY),
         "checksums": checksums,
         "compliance_standard": "SOP-EXAMPLE-001",
         "assistive_mode": True,
@@ -116,9 +134,7 @@ def collect_metadata() -> Dict[str, Any]:
 
 def render_markdown(meta: Dict[str, Any]) -> str:
     """Render model card using Jinja2 template."""
-    template_path = (
-        Path(__file__).parent.parent.parent / "templates" / "model_card.md.j2"
-    )
+    template_path = TEMPLATE_PATH
 
     if not template_path.exists():
         # Fallback to inline template if file doesn't exist
@@ -229,7 +245,7 @@ def validate_metadata_schema(meta: Dict[str, Any]) -> bool:
 
 def save_outputs(meta: Dict[str, Any]) -> Dict[str, str]:
     """Save model card outputs to files."""
-    base_path = Path(__file__).parent.parent.parent
+    base_path = BASE_PATH
     ts = datetime.datetime.now().strftime("%Y%m")
 
     # Ensure directories exist
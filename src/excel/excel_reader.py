@@ -12,14 +12,18 @@ Created by: Navid Broumandfar
 """
 
 from __future__ import annotations
+import importlib.util
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple
+from typing import Any, Dict, Optional, Tuple
 import pandas as pd
 
 from src.utils.config_loader import load_config, Config
 
+# Extra leading rows read for header detection when only a sample is requested
+HEADER_SCAN_ROWS = 50
+
 
 @dataclass
 class SheetProfile:
@@ -37,6 +41,20 @@ def _ensure_out_dir(path: str | Path) -> Path:
     return p
 
 
+def _resolve_engine(config: Config) -> Tuple[str, Optional[Dict[str, Any]]]:
+    # "auto" uses the Rust calamine reader when python-calamine is installed
+    engine = config.excel_engine
+    if engine == "auto":
+        engine = (
+            "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+        )
+    # User-supplied load options are openpyxl-specific
+    engine_kwargs = (
+        (config.excel_engine_kwargs or None) if engine == "openpyxl" else None
+    )
+    return engine, engine_kwargs
+
+
 def _detect_header(df_raw: pd.DataFrame) -> int:
     # Count non-empty per row
     counts = df_raw.apply(lambda r: r.astype(str).str.strip().ne("").sum(), axis=1)
@@ -78,14 +96,26 @@ def _profile(df: pd.DataFrame, sheet_name: str, header_row_index: int) -> SheetP
     )
 
 
-def read_review_sheet(config: Config) -> Tuple[pd.DataFrame, SheetProfile]:
+def read_review_sheet(
+    config: Config, sample_size: Optional[int] = None
+) -> Tuple[pd.DataFrame, SheetProfile]:
+    # sample_size trims the cleaned frame to its first rows (None = all); the
+    # profile always describes the whole sheet
     xlsx = Path(config.input_file)
     if not xlsx.exists():
         raise RuntimeError(f"Input file not found: {xlsx}")
 
+    engine, engine_kwargs = _resolve_engine(config)
+
     # Read raw sheet (no header) to detect header row robustly
     df_raw = pd.read_excel(
-        xlsx, sheet_name=config.sheet_name, header=None, engine="openpyxl", dtype=str
+        xlsx,
+        sheet_name=config.sheet_name,
+        header=None,
+        engine=engine,
+        engine_kwargs=engine_kwargs,
+        dtype=str,
+        nrows=None if sample_size is None else sample_size + HEADER_SCAN_ROWS,
     )
     if df_raw.empty:
         raise RuntimeError(f"Sheet '{config.sheet_name}' is empty in {xlsx.name}")
@@ -97,12 +127,15 @@ def read_review_sheet(config: Config) -> Tuple[pd.DataFrame, SheetProfile]:
         xlsx,
         sheet_name=config.sheet_name,
         header=header_idx,
-        engine="openpyxl",
+        engine=engine,
+        engine_kwargs=engine_kwargs,
         dtype=str,
     )
 
     df = _clean_df(df)
     profile = _profile(df, config.sheet_name, header_idx)
+    if sample_size is not None:
+        df = df.head(sample_size).copy()
     return df, profile
 
 
@@ -26,6 +26,11 @@ from typing import List, Optional
 
 import pandas as pd
 
+try:  # optional C-accelerated JSON encoder
+    import orjson
+except ImportError:
+    orjson = None
+
 # ---- Config defaults
 DEFAULT_WORKBOOK = "data/Sample_Review_Workbook.xlsx"
 DEFAULT_SHEET_IN = "ReviewSheet"
@@ -58,8 +63,16 @@ def backup_workbook(path: str) -> str:
 def log_write(event: dict):
     os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
     event = {"ts": dt.datetime.now().isoformat(), **event}
-    with open(LOG_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(event, ensure_ascii=False) + "\n")
+    if orjson is not None:
+        payload = orjson.dumps(event) + b"\n"
+    else:
+        payload = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+    # Single O_APPEND write: the line lands atomically even with concurrent writers
+    fd = os.open(LOG_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, payload)
+    finally:
+        os.close(fd)
 
 
 def load_review_sheet(
@@ -160,9 +173,9 @@ def write_new_sheet_openpyxl(workbook_path: str, sheet_name: str, df: pd.DataFra
 
     # Headers
     ws.append(list(df.columns))
-    # Rows
-    for _, row in df.iterrows():
-        ws.append(row.tolist())
+    # Rows (plain tuples; avoids building a Series per row)
+    for row in df.itertuples(index=False, name=None):
+        ws.append(row)
 
     wb.save(workbook_path)
     return sheet_name_final
@@ -5,7 +5,7 @@
 
 from __future__ import annotations
 import argparse, glob, hashlib, json, os
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Dict, Any, Tuple
 import pandas as pd
 
@@ -230,7 +230,9 @@ def compose_monthly_summary(month: str, sparklen: int) -> Dict[str, Any]:
     metrics = aggregate_metrics(df_inf, df_wrt, sparklen=sparklen)
     integrity = log_integrity_check(inf_int, wrt_int)
 
-    now = datetime.utcnow().isoformat() + "Z"
+    now = (
+        datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+    )
     return {
         "month": month,
         "generated_at_utc": now,
@@ -6,8 +6,10 @@
 from __future__ import annotations
 import json
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
+from typing import Any, Dict
 
 
 @dataclass
@@ -16,16 +18,36 @@ class Config:
     sheet_name: str = "ReviewSheet"
     out_dir: str = "out"
     preview_rows: int = 200
+    lm_studio_url: str = "http://127.0.0.1:1234/v1"
+    similarity_scorer: str = "token_set_ratio"  # rapidfuzz.fuzz scorer name
+    llm_max_concurrency: int = 4  # LLM requests kept in flight at once
+    llm_cache: bool = False  # opt-in persistent cache of identical LLM requests
+    excel_engine: str = "auto"  # pandas read_excel engine; auto prefers calamine
+    # extra openpyxl.load_workbook options; pandas already loads read_only,
+    # data_only and without external links, so only set this to go beyond that
+    excel_engine_kwargs: Dict[str, Any] = field(default_factory=dict)
 
 
 _DEF = Config()
 
 
+def _read_config_file(path: str) -> dict:
+    # parsed once per (path, mtime, size), so edits are picked up on the next load
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    return _parse_config_file(path, st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=8)
+def _parse_config_file(path: str, mtime_ns: int, size: int) -> dict:
+    # callers copy before applying overrides
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
 def load_config(path: str | Path = "config.json") -> Config:
-    cfg = dict()
-    p = Path(path)
-    if p.exists():
-        cfg = json.loads(p.read_text(encoding="utf-8"))
+    cfg = dict(_read_config_file(str(path)))
 
     # env overrides
     cfg_env = {
@@ -33,14 +55,27 @@ def load_config(path: str | Path = "config.json") -> Config:
         "sheet_name": os.getenv("EXCEL_REVIEW_SHEET_NAME"),
         "out_dir": os.getenv("EXCEL_REVIEW_OUT_DIR"),
         "preview_rows": os.getenv("EXCEL_REVIEW_PREVIEW_ROWS"),
+        "lm_studio_url": os.getenv("EXCEL_REVIEW_LM_STUDIO_URL"),
+        "similarity_scorer": os.getenv("EXCEL_REVIEW_SIMILARITY_SCORER"),
+        "llm_max_concurrency": os.getenv("EXCEL_REVIEW_LLM_MAX_CONCURRENCY"),
+        "llm_cache": os.getenv("EXCEL_REVIEW_LLM_CACHE"),
+        "excel_engine": os.getenv("EXCEL_REVIEW_EXCEL_ENGINE"),
     }
     cfg.update({k: v for k, v in cfg_env.items() if v not in (None, "")})
 
     # coerce types
     pr = int(cfg.get("preview_rows", _DEF.preview_rows))
+    mc = max(1, int(cfg.get("llm_max_concurrency", _DEF.llm_max_concurrency)))
+    lc = str(cfg.get("llm_cache", _DEF.llm_cache)).lower() in ("1", "true", "yes")
     return Config(
         input_file=cfg.get("input_file", _DEF.input_file),
         sheet_name=cfg.get("sheet_name", _DEF.sheet_name),
         out_dir=cfg.get("out_dir", _DEF.out_dir),
         preview_rows=pr,
+        lm_studio_url=cfg.get("lm_studio_url", _DEF.lm_studio_url),
+        similarity_scorer=cfg.get("similarity_scorer", _DEF.similarity_scorer),
+        llm_max_concurrency=mc,
+        llm_cache=lc,
+        excel_engine=cfg.get("excel_engine", _DEF.excel_engine),
+        excel_engine_kwargs=dict(cfg.get("excel_engine_kwargs") or {}),
     )
@@ -0,0 +1,77 @@
+# ⚠️ Compliance Notice:
+# Assistive mode only. This cache stores raw LLM completions for reuse.
+# It never alters validated Excel ranges; every inference is still logged by its caller.
+
+"""
+LLM Response Cache
+Persistent exact-match cache for LM Studio chat completions.
+
+Requests are keyed by a SHA-256 of the canonical JSON payload (messages, sampling
+parameters) together with the server URL and the id of the model actually loaded,
+so only byte-identical requests to the same model are served from cache.
+Entries live in a local SQLite file and survive between demo runs.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_FILE = "data/cache/llm_cache.sqlite"
+
+
+class LLMCache:
+    """SQLite-backed cache of chat completion contents keyed by request payload."""
+
+    def __init__(self, cache_file: str | Path = DEFAULT_CACHE_FILE):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            cache_file: Path to the SQLite cache file
+        """
+        self.cache_file = Path(cache_file)
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.cache_file), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, created_at TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(payload: Dict[str, Any], model_id: str, base_url: str) -> str:
+        """Return the cache key for a request payload sent to model_id at base_url."""
+        canonical = json.dumps(
+            {"payload": payload, "model_id": model_id, "base_url": base_url},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached completion content for key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, content: str) -> None:
+        """Store the completion content for key."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, content, created_at) "
+                "VALUES (?, ?, datetime('now'))",
+                (key, content),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
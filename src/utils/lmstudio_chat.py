@@ -8,7 +8,6 @@ Chat with the same LLM model used by the Excel Review agent.
 """
 
 from __future__ import annotations
-import json
 import sys
 import os
 from pathlib import Path
@@ -54,12 +53,7 @@ You are helpful, accurate, and aware of your role in the agentic automation work
 def get_lm_studio_url() -> str:
     """Get LM Studio URL from config or use default."""
     try:
-        config_path = Path("config.json")
-        if config_path.exists():
-            config = json.loads(config_path.read_text(encoding="utf-8"))
-            lm_studio_url = config.get("lm_studio_url", "http://127.0.0.1:1234/v1")
-        else:
-            lm_studio_url = "http://127.0.0.1:1234/v1"
+        lm_studio_url = load_config().lm_studio_url
     except Exception:
         lm_studio_url = "http://127.0.0.1:1234/v1"
 
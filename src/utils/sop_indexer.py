@@ -19,10 +19,13 @@ import re
 import json
 import hashlib
 import argparse
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Union, Tuple
 from dataclasses import dataclass, asdict
+from functools import lru_cache
 import logging
 
 import pandas as pd
@@ -34,12 +37,41 @@ import numpy as np
 from sentence_transformers import SentenceTransformer
 from pypdf import PdfReader
 from docx import Document
-import jsonlines
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Process-wide LRU of text embeddings keyed by (model_name, sha1(text)), shared
+# by every vector store so repeated chunks and queries skip the encoder
+_EMBEDDING_CACHE: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+_EMBEDDING_CACHE_SIZE = 4096
+_EMBEDDING_CACHE_LOCK = threading.Lock()
+ENCODE_BATCH_SIZE = 64
+
+
+@lru_cache(maxsize=None)
+def _load_encoder(model_name: str) -> SentenceTransformer:
+    """Load a SentenceTransformer once per process and share it across stores"""
+    logger.info(f"Loading embedding model: {model_name}")
+    return SentenceTransformer(model_name)
+
+
+# libyaml-backed safe loader/dumper when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Patterns compiled once at import rather than on every call
+SECTION_HEADER_RE = re.compile(
+    r"^(?:\d+(?:\.\d+)*\s+|Attachment\s+\d+\s+-\s+|Definitions|Scope|Responsibilities|Monthly Quality Reviews Review)",
+    re.MULTILINE,
+)
+REVISION_RE = re.compile(r"rev\s*(\d+\.?\w*)", re.IGNORECASE)
+EFFECTIVE_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+ATTACHMENT_RE = re.compile(r"Attachment\s+(\d+)", re.IGNORECASE)
+SECTION_ID_RE = re.compile(r"(\d+(?:\.\d+)*)")
+SOP_NUMBER_RE = re.compile(r"(\d{6})")
+
 
 @dataclass
 class RawDoc:
@@ -93,15 +125,57 @@ class VectorStoreHandle:
     def __init__(self, store_type: str, model_name: str):
         self.store_type = store_type
         self.model_name = model_name
-        self.embedder = SentenceTransformer(model_name)
+        self.embedder = _load_encoder(model_name)
         self.dimension = self.embedder.get_sentence_embedding_dimension()
 
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Encode texts, reusing cached embeddings for previously seen texts"""
+        if not texts:
+            return np.empty((0, self.dimension), dtype="float32")
+
+        keys = [
+            (self.model_name, hashlib.sha1(text.encode("utf-8")).hexdigest())
+            for text in texts
+        ]
+        found = {}
+        missing = {}
+        with _EMBEDDING_CACHE_LOCK:
+            for key, text in zip(keys, texts):
+                if key in _EMBEDDING_CACHE:
+                    _EMBEDDING_CACHE.move_to_end(key)
+                    found[key] = _EMBEDDING_CACHE[key]
+                else:
+                    missing.setdefault(key, text)
+
+        if missing:
+            # The shared encoder runs outside the lock so threads can overlap
+            encoded = self.embedder.encode(
+                list(missing.values()),
+                batch_size=ENCODE_BATCH_SIZE,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+            )
+            with _EMBEDDING_CACHE_LOCK:
+                for key, vector in zip(missing, encoded):
+                    _EMBEDDING_CACHE[key] = vector
+                    found[key] = vector
+                while len(_EMBEDDING_CACHE) > _EMBEDDING_CACHE_SIZE:
+                    _EMBEDDING_CACHE.popitem(last=False)
+
+        return np.stack([found[key] for key in keys])
+
     def add_chunks(self, chunks: List[Chunk]) -> None:
         """Add chunks to the vector store"""
         raise NotImplementedError
 
     def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
         """Search for similar chunks"""
+        return self.search_batch([query], top_k)[0]
+
+    def search_batch(
+        self, queries: List[str], top_k: int = 3
+    ) -> List[List[Dict[str, Any]]]:
+        """Search for similar chunks for several queries in one call"""
         raise NotImplementedError
 
     def get_stats(self) -> Dict[str, Any]:
@@ -168,7 +242,7 @@ class ChromaVectorStore(VectorStoreHandle):
             metadatas.append(cleaned_metadata)
 
         # Generate embeddings
-        embeddings = self.embedder.encode(documents).tolist()
+        embeddings = self.embed(documents).tolist()
 
         # Add to collection
         self.collection.add(
@@ -177,33 +251,40 @@ class ChromaVectorStore(VectorStoreHandle):
 
         logger.info(f"Added {len(new_chunks)} new chunks to ChromaDB index")
 
-    def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
-        """Search ChromaDB for similar chunks"""
-        query_embedding = self.embedder.encode([query]).tolist()
+    def search_batch(
+        self, queries: List[str], top_k: int = 3
+    ) -> List[List[Dict[str, Any]]]:
+        """Search ChromaDB for similar chunks for several queries at once"""
+        if not queries:
+            return []
+        query_embeddings = self.embed(queries).tolist()
 
         results = self.collection.query(
-            query_embeddings=query_embedding,
+            query_embeddings=query_embeddings,
             n_results=top_k,
             include=["documents", "metadatas", "distances"],
         )
 
         # Convert to standard format
-        search_results = []
-        for i in range(len(results["documents"][0])):
-            metadata = results["metadatas"][0][i]
-            distance = results["distances"][0][i]
-            similarity = 1 - distance  # Convert distance to similarity
-
-            search_results.append(
-                {
-                    "content": results["documents"][0][i],
-                    "metadata": metadata,
-                    "similarity": similarity,
-                    "distance": distance,
-                }
-            )
+        batch_results = []
+        for documents, metadatas, distances in zip(
+            results["documents"], results["metadatas"], results["distances"]
+        ):
+            search_results = []
+            for content, metadata, distance in zip(documents, metadatas, distances):
+                similarity = 1 - distance  # Convert distance to similarity
+
+                search_results.append(
+                    {
+                        "content": content,
+                        "metadata": metadata,
+                        "similarity": similarity,
+                        "distance": distance,
+                    }
+                )
+            batch_results.append(search_results)
 
-        return search_results
+        return batch_results
 
     def get_stats(self) -> Dict[str, Any]:
         """Get ChromaDB statistics"""
@@ -255,7 +336,7 @@ class FAISSVectorStore(VectorStoreHandle):
             return
 
         # Generate embeddings
-        embeddings = self.embedder.encode([chunk.content for chunk in new_chunks])
+        embeddings = self.embed([chunk.content for chunk in new_chunks])
 
         # Normalize for cosine similarity
         faiss.normalize_L2(embeddings)
@@ -282,27 +363,35 @@ class FAISSVectorStore(VectorStoreHandle):
 
         logger.info(f"Added {len(new_chunks)} new chunks to FAISS index")
 
-    def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
-        """Search FAISS index for similar chunks"""
-        query_embedding = self.embedder.encode([query])
-        faiss.normalize_L2(query_embedding)
-
-        scores, indices = self.index.search(query_embedding.astype("float32"), top_k)
-
-        search_results = []
-        for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-            if idx < len(self.metadata):
-                metadata = self.metadata[idx]
-                search_results.append(
-                    {
-                        "content": metadata.get("content", ""),
-                        "metadata": metadata,
-                        "similarity": float(score),
-                        "distance": 1 - float(score),
-                    }
-                )
+    def search_batch(
+        self, queries: List[str], top_k: int = 3
+    ) -> List[List[Dict[str, Any]]]:
+        """Search FAISS index for several queries with one matrix product"""
+        if not queries:
+            return []
+        query_embeddings = np.ascontiguousarray(self.embed(queries), dtype="float32")
+        faiss.normalize_L2(query_embeddings)
+
+        scores, indices = self.index.search(query_embeddings, top_k)
+
+        batch_results = []
+        for row_scores, row_indices in zip(scores, indices):
+            search_results = []
+            for score, idx in zip(row_scores, row_indices):
+                # FAISS pads with -1 when the index holds fewer than top_k vectors
+                if 0 <= idx < len(self.metadata):
+                    metadata = self.metadata[idx]
+                    search_results.append(
+                        {
+                            "content": metadata.get("content", ""),
+                            "metadata": metadata,
+                            "similarity": float(score),
+                            "distance": 1 - float(score),
+                        }
+                    )
+            batch_results.append(search_results)
 
-        return search_results
+        return batch_results
 
     def get_stats(self) -> Dict[str, Any]:
         """Get FAISS statistics"""
@@ -322,13 +411,16 @@ class SOPIndexer:
         embeddings_dir: str,
         model_name: str = "all-MiniLM-L6-v2",
         use_faiss: bool = False,
+        vector_store: Optional[VectorStoreHandle] = None,
     ):
         self.embeddings_dir = embeddings_dir
         self.model_name = model_name
         self.use_faiss = use_faiss
 
-        # Initialize vector store
-        if use_faiss:
+        # Initialize vector store (reuse a pre-built one instead of reopening the index)
+        if vector_store is not None:
+            self.vector_store = vector_store
+        elif use_faiss:
             self.vector_store = FAISSVectorStore(embeddings_dir, model_name)
         else:
             self.vector_store = ChromaVectorStore(embeddings_dir, model_name)
@@ -346,23 +438,21 @@ class SOPIndexer:
         docs = []
 
         for path in paths:
-            if not os.path.exists(path):
-                logger.warning(f"File not found: {path}")
+            file_ext = Path(path).suffix.lower()
+            if file_ext not in (".pdf", ".docx"):
+                logger.warning(f"Unsupported file type: {file_ext}")
                 continue
 
             try:
+                # Opening the file is the existence check; no separate stat call
                 checksum = self.compute_sha256(path)
-                file_ext = Path(path).suffix.lower()
 
                 if file_ext == ".pdf":
                     content = self._extract_pdf_content(path)
                     doc_type = "pdf"
-                elif file_ext == ".docx":
+                else:
                     content = self._extract_docx_content(path)
                     doc_type = "docx"
-                else:
-                    logger.warning(f"Unsupported file type: {file_ext}")
-                    continue
 
                 # Extract title from filename
                 title = Path(path).stem
@@ -385,6 +475,9 @@ class SOPIndexer:
 
                 logger.info(f"Loaded {doc_type}: {title}")
 
+            except FileNotFoundError:
+                logger.warning(f"File not found: {path}")
+                continue
             except Exception as e:
                 logger.error(f"Error loading {path}: {e}")
                 continue
@@ -394,42 +487,35 @@ class SOPIndexer:
     def _extract_pdf_content(self, filepath: str) -> str:
         """Extract text content from PDF"""
         reader = PdfReader(filepath)
-        content = ""
-        for page in reader.pages:
-            content += page.extract_text() + "\n"
-        return content.strip()
+        return "\n".join(page.extract_text() for page in reader.pages).strip()
 
     def _extract_docx_content(self, filepath: str) -> str:
         """Extract text content from DOCX"""
         doc = Document(filepath)
-        content = ""
-        for paragraph in doc.paragraphs:
-            content += paragraph.text + "\n"
-        return content.strip()
+        return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
 
     def _extract_revision(self, title: str) -> Optional[str]:
         """Extract revision from title (e.g., '15.A')"""
-        rev_match = re.search(r"rev\s*(\d+\.?\w*)", title, re.IGNORECASE)
+        rev_match = REVISION_RE.search(title)
         return rev_match.group(1) if rev_match else None
 
     def _extract_effective_date(self, title: str) -> Optional[str]:
         """Extract effective date from title"""
-        date_match = re.search(r"(\d{4}-\d{2}-\d{2})", title)
+        date_match = EFFECTIVE_DATE_RE.search(title)
         return date_match.group(1) if date_match else None
 
     def chunk_and_clean(self, docs: List[RawDoc]) -> List[Chunk]:
         """Chunk documents into semantically meaningful pieces"""
         chunks = []
-
-        # Regex for identifying section headers
-        section_pattern = re.compile(
-            r"^(?:\d+(?:\.\d+)*\s+|Attachment\s+\d+\s+-\s+|Definitions|Scope|Responsibilities|Monthly Quality Reviews Review)",
-            re.MULTILINE,
-        )
+        # One timestamp for the whole chunking run
+        created_at = datetime.now().isoformat()
 
         for doc in docs:
+            # The doc id depends only on the title; resolve it once per document
+            doc_id = self._extract_doc_id(doc.title)
+
             # Find all section headers and their positions
-            matches = list(section_pattern.finditer(doc.content))
+            matches = list(SECTION_HEADER_RE.finditer(doc.content))
 
             if not matches:
                 # No sections found, treat entire document as one chunk
@@ -444,12 +530,12 @@ class SOPIndexer:
                             section="Unknown",
                             section_title="Full Document",
                             page=1,
-                            doc_id=self._extract_doc_id(doc.title),
+                            doc_id=doc_id,
                             title=doc.title,
                             filepath=doc.filepath,
                             checksum=doc.checksum,
                             source_type=doc.doc_type,
-                            created_at=datetime.now().isoformat(),
+                            created_at=created_at,
                             model=self.model_name,
                             rev=doc.rev,
                             effective_date=doc.effective_date,
@@ -489,12 +575,12 @@ class SOPIndexer:
                                 section=section_id,
                                 section_title=section_title,
                                 page=1,  # TODO: Implement page tracking
-                                doc_id=self._extract_doc_id(doc.title),
+                                doc_id=doc_id,
                                 title=doc.title,
                                 filepath=doc.filepath,
                                 checksum=doc.checksum,
                                 source_type=doc.doc_type,
-                                created_at=datetime.now().isoformat(),
+                                created_at=created_at,
                                 model=self.model_name,
                                 rev=doc.rev,
                                 effective_date=doc.effective_date,
@@ -507,12 +593,12 @@ class SOPIndexer:
     def _extract_section_id(self, header: str) -> str:
         """Extract section ID from header"""
         # Check for attachment first
-        attachment_match = re.search(r"Attachment\s+(\d+)", header, re.IGNORECASE)
+        attachment_match = ATTACHMENT_RE.search(header)
         if attachment_match:
             return f"Attachment {attachment_match.group(1)}"
 
         # Look for patterns like "4.1.3"
-        section_match = re.search(r"(\d+(?:\.\d+)*)", header)
+        section_match = SECTION_ID_RE.search(header)
         if section_match:
             return section_match.group(1)
 
@@ -530,24 +616,29 @@ class SOPIndexer:
         chunks = []
         sentences = content.split(". ")
 
-        current_chunk = ""
+        # Track the running length instead of concatenating just to measure it
+        current_parts: List[str] = []
+        current_len = 0
         for sentence in sentences:
-            if len(current_chunk + sentence) <= max_length:
-                current_chunk += sentence + ". "
+            piece = sentence + ". "
+            if current_len + len(sentence) <= max_length:
+                current_parts.append(piece)
+                current_len += len(piece)
             else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence + ". "
+                if current_parts:
+                    chunks.append("".join(current_parts).strip())
+                current_parts = [piece]
+                current_len = len(piece)
 
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+        if current_parts:
+            chunks.append("".join(current_parts).strip())
 
         return chunks
 
     def _extract_doc_id(self, title: str) -> str:
         """Extract document ID from title"""
         # Look for SOP number pattern
-        sop_match = re.search(r"(\d{6})", title)
+        sop_match = SOP_NUMBER_RE.search(title)
         if sop_match:
             return sop_match.group(1)
         return "Unknown"
@@ -563,8 +654,21 @@ class SOPIndexer:
         self, reason_text: str, top_k: int = 3
     ) -> List[RetrievalResult]:
         """Find relevant SOP clauses for a given reason"""
-        search_results = self.vector_store.search(reason_text, top_k)
+        return self.find_relevant_sop_batch([reason_text], top_k)[0]
+
+    def find_relevant_sop_batch(
+        self, reason_texts: List[str], top_k: int = 3
+    ) -> List[List[RetrievalResult]]:
+        """Find relevant SOP clauses for several reasons with one index search"""
+        return [
+            self._to_retrieval_results(search_results)
+            for search_results in self.vector_store.search_batch(reason_texts, top_k)
+        ]
 
+    def _to_retrieval_results(
+        self, search_results: List[Dict[str, Any]]
+    ) -> List[RetrievalResult]:
+        """Convert raw vector store hits to RetrievalResult objects"""
         results = []
         for result in search_results:
             metadata = result["metadata"]
@@ -610,7 +714,7 @@ class SOPIndexer:
 
         # Load taxonomy
         with open(taxonomy_yaml, "r", encoding="utf-8") as f:
-            taxonomy = yaml.safe_load(f)
+            taxonomy = yaml.load(f, Loader=YAML_LOADER)
 
         if not isinstance(taxonomy, list):
             logger.error("Taxonomy should be a list of reason objects")
@@ -618,23 +722,35 @@ class SOPIndexer:
 
         mappings = []
         log_entries = []
+        # One timestamp for the whole mapping run
+        timestamp = datetime.now().isoformat()
 
-        for reason_item in taxonomy:
-            if not isinstance(reason_item, dict) or "label" not in reason_item:
-                continue
+        reason_items = [
+            item for item in taxonomy if isinstance(item, dict) and "label" in item
+        ]
+
+        # Search every reason label and synonym in a single batched lookup
+        search_queries = [
+            [
+                query
+                for query in [item["label"]] + item.get("synonyms", [])
+                if query.strip()
+            ]
+            for item in reason_items
+        ]
+        flat_results = self.find_relevant_sop_batch(
+            [query for queries in search_queries for query in queries], top_k
+        )
 
+        offset = 0
+        for reason_item, queries in zip(reason_items, search_queries):
             reason_label = reason_item["label"]
             reason_id = reason_item.get("id", "")
-            synonyms = reason_item.get("synonyms", [])
 
-            # Search for this reason and its synonyms
-            search_queries = [reason_label] + synonyms
             all_results = []
-
-            for query in search_queries:
-                if query.strip():
-                    results = self.find_relevant_sop(query, top_k)
-                    all_results.extend(results)
+            for results in flat_results[offset : offset + len(queries)]:
+                all_results.extend(results)
+            offset += len(queries)
 
             # Remove duplicates and sort by score
             unique_results = {}
@@ -672,7 +788,7 @@ class SOPIndexer:
 
                 # Log entry
                 log_entry = {
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": timestamp,
                     "reason": reason_label,
                     "reason_id": reason_id,
                     "topk": [
@@ -699,13 +815,20 @@ class SOPIndexer:
         # Save mappings
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         with open(output_path, "w", encoding="utf-8") as f:
-            yaml.dump(mappings, f, default_flow_style=False, allow_unicode=True)
+            yaml.dump(
+                mappings,
+                f,
+                Dumper=YAML_DUMPER,
+                default_flow_style=False,
+                allow_unicode=True,
+            )
 
         # Save logs
         os.makedirs(os.path.dirname(log_path), exist_ok=True)
-        with jsonlines.open(log_path, "w") as writer:
-            for entry in log_entries:
-                writer.write(entry)
+        # Serialize all entries first, then hand them to one buffered writelines()
+        lines = [json.dumps(entry, ensure_ascii=False) + "\n" for entry in log_entries]
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
 
         logger.info(f"Generated {len(mappings)} reason mappings")
         logger.info(f"Saved mappings to: {output_path}")
@@ -17,15 +17,35 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Tuple, Iterable
 
+import numpy as np
 import pandas as pd
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 import yaml
 
+try:  # optional C-accelerated JSON encoder
+    import orjson
+except ImportError:
+    orjson = None
+
 REASON_COL = "reason"  # from M2 schema
 CONF_COL = "confidence"  # 0..1
 MODEL_VER_COL = "model_version"  # optional in logs
 
 NORMALIZE_RE = re.compile(r"[^\w\s]", flags=re.UNICODE)
+WHITESPACE_RE = re.compile(r"\s+")
+# ASCII fast path for normalize_reason: every ASCII char that is neither a word
+# char nor whitespace maps to a space (same set NORMALIZE_RE replaces)
+ASCII_PUNCT_TABLE = str.maketrans(
+    {
+        chr(c): " "
+        for c in range(128)
+        if not (chr(c).isalnum() or chr(c) == "_" or chr(c).isspace())
+    }
+)
+
+# libyaml-backed safe loader/dumper when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
 
 
 def sha256_file(path: Path) -> str:
@@ -41,9 +61,12 @@ def sha256_text(text: str) -> str:
 
 
 def normalize_reason(s: str) -> str:
+    if s.isascii():
+        # translate + split/join run in C and match the regex path exactly
+        return " ".join(s.lower().translate(ASCII_PUNCT_TABLE).split())
     s = s.strip().lower()
     s = NORMALIZE_RE.sub(" ", s)
-    s = re.sub(r"\s+", " ", s)
+    s = WHITESPACE_RE.sub(" ", s)
     return s.strip()
 
 
@@ -114,11 +137,20 @@ def cluster_reasons(
         if ri != rj:
             parent[rj] = ri
 
-    # Union by fuzzy similarity
-    for i in range(len(norms)):
-        for j in range(i + 1, len(norms)):
-            score = fuzz.token_sort_ratio(norms[i], norms[j])
-            if score >= threshold:
+    # Union by fuzzy similarity: rapidfuzz scores a block of rows against all
+    # norms in C across all cores; blocks bound the score matrix memory
+    block = 1024
+    for start in range(0, len(norms), block):
+        scores = process.cdist(
+            norms[start : start + block],
+            norms,
+            scorer=fuzz.token_sort_ratio,
+            score_cutoff=threshold,
+            workers=-1,
+        )
+        rows, cols = np.nonzero(scores >= threshold)
+        for i, j in zip((rows + start).tolist(), cols.tolist()):
+            if i < j:
                 union(i, j)
 
     # Gather clusters by root
@@ -166,9 +198,16 @@ def build_yaml_payload(
             for s in samples
         ]
     )
+    # group once so each cluster gathers its rows instead of rescanning the frame
+    by_norm = dict(tuple(df.groupby("norm", sort=False)))
     items = []
     for canon_norm, aliases in canon_to_aliases.items():
-        sub = df[df["norm"].isin([normalize_reason(a) for a in aliases])]
+        parts = [
+            by_norm[n]
+            for n in dict.fromkeys(normalize_reason(a) for a in aliases)
+            if n in by_norm
+        ]
+        sub = pd.concat(parts) if parts else df.iloc[0:0]
         items.append(
             {
                 "canonical": (
@@ -198,15 +237,27 @@ def load_latest_yaml(path_latest: Path) -> dict | None:
     if not path_latest.exists():
         return None
     with path_latest.open("r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+        return yaml.load(f, Loader=YAML_LOADER) or {}
 
 
 def yaml_content_hash(payload: dict) -> str:
+    # generated_at differs on every run; leave it out so equal taxonomies hash equal
+    content = {k: v for k, v in payload.items() if k != "generated_at"}
     # dump canonical with sorted keys for stable hash
-    text = yaml.safe_dump(payload, sort_keys=True, allow_unicode=True)
+    text = yaml.dump(content, Dumper=YAML_DUMPER, sort_keys=True, allow_unicode=True)
     return sha256_text(text)
 
 
+def read_checksum_header(path: Path) -> str | None:
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            first = f.readline()
+    except FileNotFoundError:
+        return None
+    prefix = "# file_checksum_sha256: "
+    return first[len(prefix) :].strip() if first.startswith(prefix) else None
+
+
 def write_versioned_yaml(payload: dict, out_latest: Path) -> Tuple[Path, str, int]:
     out_dir = out_latest.parent
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -218,7 +269,7 @@ def write_versioned_yaml(payload: dict, out_latest: Path) -> Tuple[Path, str, in
         next_v = max_v + 1
     versioned = out_dir / f"reasons.v{next_v}.yml"
     # add header comment with checksum
-    text = yaml.safe_dump(payload, sort_keys=False, allow_unicode=True)
+    text = yaml.dump(payload, Dumper=YAML_DUMPER, sort_keys=False, allow_unicode=True)
     checksum = sha256_text(text)
     header = f"# file_checksum_sha256: {checksum}\n"
     versioned.write_text(header + text, encoding="utf-8")
@@ -275,12 +326,19 @@ def write_drift_csv(
     )
     rows = []
     total = len(df)
+    # per-alias count/mean in one grouped pass instead of a filter per alias
+    alias_stats = {}
+    if total:
+        agg = df.groupby("alias", sort=False)["conf"].agg(["size", "mean"])
+        alias_stats = {
+            alias: (int(size), float(mean)) for alias, size, mean in agg.itertuples()
+        }
     for canon_norm, aliases in canon_to_aliases.items():
         for alias in aliases:
-            sub = df[df["alias"] == alias]
-            if sub.empty:
+            stats = alias_stats.get(alias)
+            if stats is None:
                 continue
-            count = int(len(sub))
+            count, avg_conf = stats
             share = round(100.0 * count / max(total, 1), 2)
             rows.append(
                 {
@@ -289,7 +347,7 @@ def write_drift_csv(
                     "canonical_norm": canon_norm,
                     "count": count,
                     "share_pct": share,
-                    "avg_conf": float(sub["conf"].mean()),
+                    "avg_conf": avg_conf,
                 }
             )
     meta = "# input_checksums=" + json.dumps(input_checksums)
@@ -305,10 +363,16 @@ def append_changes_log(
         return
     out_jsonl.parent.mkdir(parents=True, exist_ok=True)
     ts = datetime.now(timezone.utc).isoformat()
-    with out_jsonl.open("a", encoding="utf-8") as f:
-        for ch in changes:
-            rec = {"ts": ts, **context, **ch}
-            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    records = [{"ts": ts, **context, **ch} for ch in changes]
+    # Serialize every record up front and append them in a single write
+    if orjson is not None:
+        payload = b"\n".join(orjson.dumps(rec) for rec in records) + b"\n"
+    else:
+        payload = "".join(
+            json.dumps(rec, ensure_ascii=False) + "\n" for rec in records
+        ).encode("utf-8")
+    with out_jsonl.open("ab") as f:
+        f.write(payload)
 
 
 def main(argv=None):
@@ -349,7 +413,9 @@ def main(argv=None):
     changed = yaml_content_hash(old_latest or {}) != yaml_content_hash(payload)
 
     if args.verbose:
-        print(yaml.safe_dump(payload, sort_keys=False, allow_unicode=True))
+        print(
+            yaml.dump(payload, Dumper=YAML_DUMPER, sort_keys=False, allow_unicode=True)
+        )
 
     if not args.dry_run:
         if changed:
@@ -357,12 +423,19 @@ def main(argv=None):
                 payload, args.output_yaml
             )
         else:
-            # mirror latest write to embed checksum header even if unchanged
-            text = yaml.safe_dump(payload, sort_keys=False, allow_unicode=True)
-            out_checksum = sha256_text(text)
-            header = f"# file_checksum_sha256: {out_checksum}\n"
-            args.output_yaml.parent.mkdir(parents=True, exist_ok=True)
-            args.output_yaml.write_text(header + text, encoding="utf-8")
+            # unchanged: keep the existing latest file if it already has its header
+            out_checksum = read_checksum_header(args.output_yaml)
+            if out_checksum is None:
+                # mirror latest write to embed checksum header
+                text = yaml.dump(
+                    payload, Dumper=YAML_DUMPER, sort_keys=False, allow_unicode=True
+                )
+                out_checksum = sha256_text(text)
+                header = f"# file_checksum_sha256: {out_checksum}\n"
+                args.output_yaml.parent.mkdir(parents=True, exist_ok=True)
+                args.output_yaml.write_text(header + text, encoding="utf-8")
+            elif args.verbose:
+                print(f"No change: {args.output_yaml} left as is")
             versioned_path, vnum = None, None
 
         # Drift per requested month (write one CSV per invocation param)
@@ -0,0 +1,14 @@
+# ⚠️ Compliance Notice:
+# Assistive mode only. Timestamps are written to audit logs; no workbook data is touched.
+
+"""
+Timestamp helpers shared by the orchestrator and publication logs.
+"""
+
+from __future__ import annotations
+from datetime import datetime, timezone
+
+
+def now_iso() -> str:
+    # UTC, millisecond precision, "Z" suffix; aware isoformat always ends "+00:00"
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")[:-6] + "Z"